@@ -0,0 +1,134 @@
+# app/admission.py
+import asyncio
+import hashlib
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+# Rejected requests are told to come back after roughly this long (seconds) at minimum
+MIN_RETRY_AFTER_SECONDS = 1
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing more work; rendered as 429/503 with Retry-After by main.py."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Concurrency cap with a bounded wait queue for one family of agent endpoints.
+
+    Up to ``max_concurrent`` runs execute at once and up to ``max_waiting`` more
+    wait for a slot. Anything beyond that is rejected immediately with 429; a
+    request that waited ``wait_timeout`` seconds without getting a slot gets 503.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_waiting: int, wait_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max(0, max_waiting)
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.stats = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self._avg_hold_seconds = 5.0
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrent: int, max_waiting: int, wait_timeout: float = 10.0) -> "AdmissionLimiter":
+        """Reads <NAME>_MAX_CONCURRENCY, <NAME>_MAX_QUEUE and <NAME>_QUEUE_TIMEOUT_SECONDS."""
+        prefix = name.upper()
+        return cls(
+            name,
+            _env_int(f"{prefix}_MAX_CONCURRENCY", max_concurrent),
+            _env_int(f"{prefix}_MAX_QUEUE", max_waiting),
+            float(os.getenv(f"{prefix}_QUEUE_TIMEOUT_SECONDS", str(wait_timeout))),
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has probably drained."""
+        rounds = (self.waiting + 1) / self.max_concurrent
+        return max(MIN_RETRY_AFTER_SECONDS, math.ceil(rounds * self._avg_hold_seconds))
+
+    async def acquire(self) -> Callable[[], None]:
+        """Waits for a slot (or raises AdmissionRejected) and returns its release function."""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # a free slot is taken without suspending
+        elif self.waiting >= self.max_waiting:
+            self.stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(429, f"Too many concurrent {self.name} requests, please retry shortly.", self.retry_after())
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected_timeout"] += 1
+                raise AdmissionRejected(503, f"The {self.name} service is busy, please retry shortly.", self.retry_after())
+            finally:
+                self.waiting -= 1
+        self.active += 1
+        self.stats["admitted"] += 1
+        start = time.monotonic()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.active -= 1
+                self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * (time.monotonic() - start)
+                self._semaphore.release()
+        return release
+
+    async def run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        release = await self.acquire()
+        try:
+            return await fn()
+        finally:
+            release()
+
+    def snapshot(self) -> dict:
+        return {"active": self.active, "waiting": self.waiting, "max_concurrent": self.max_concurrent, "max_waiting": self.max_waiting, **self.stats}
+
+
+class SingleFlight:
+    """Runs at most one coroutine per key; concurrent callers with the same key share its result.
+
+    The shared run is a task of its own, so a caller that disconnects does not
+    cancel the run for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            task = self._inflight[key] = asyncio.create_task(fn())
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure is not reported as lost
+
+
+def message_key(*parts: str) -> str:
+    """Stable key for "same session, same message" coalescing."""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
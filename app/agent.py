@@ -1,52 +1,73 @@
 # app/agent.py
 import os
 from google.adk.agents.llm_agent import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioConnectionParams
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioConnectionParams, StreamableHTTPConnectionParams
 from google.adk.models import Gemini
 
-# Try to load .env file if it exists (for local development)
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    print("DEBUG: dotenv loaded successfully")
-except ImportError:
-    # dotenv not available, which is fine for production deployments
-    print("DEBUG: dotenv not available, using system environment variables")
-
-mcp_connection_params = StdioConnectionParams(
-    server_params={
-        "command": "python",
-        "args": ["-m", "app.mcp_server"],
-    },
-    timeout=60.0,
-)
-
-# Get the API key from environment variables
-api_key = os.getenv("GOOGLE_API_KEY")
-print(f"API Key loaded successfully: {'Yes' if api_key else 'No'}")
-
-if not api_key:
-    raise ValueError("LLM configuration error: Please set GOOGLE_API_KEY environment variable.")
+from . import config  # loads .env before any setting is read
+from .context_budget import count_usage, manage_context
+
+# URL of a running `python -m app.mcp_server --transport http` service, e.g.
+# http://127.0.0.1:8765/mcp. When unset, the tool server is spawned over stdio.
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
+
+def build_mcp_connection_params():
+    if MCP_SERVER_URL:
+        return StreamableHTTPConnectionParams(url=MCP_SERVER_URL, timeout=30.0)
+    return StdioConnectionParams(
+        server_params={
+            "command": "python",
+            "args": ["-m", "app.mcp_server"],
+        },
+        timeout=60.0,
+    )
+
+mcp_connection_params = build_mcp_connection_params()
+
+def compact_tool_response(tool, args, tool_context, tool_response):
+    """Hands the model a tool's structured result alone, not the whole MCP envelope.
+
+    MCP results carry the same JSON twice (text content and structured content);
+    keeping one copy halves the tokens every tool response adds to the prompt.
+    """
+    # McpTool hands callbacks the result dumped to a dict with the MCP wire names
+    if not isinstance(tool_response, dict):
+        return None
+    structured = tool_response.get("structuredContent")
+    if not isinstance(structured, dict) or tool_response.get("isError"):
+        return None
+    return structured
 
 # --- Define the FitForge Agent ---
-fitforge_agent = LlmAgent(
-    name="fitforge_agent",
-    description="A comprehensive AI fitness and nutrition coach.",
-    # --- ADDED: Strict instructions for the agent's persona and scope ---
-    instruction=(
-        "You are FitForge, an expert AI fitness and nutrition coach. "
-        "Your sole purpose is to assist users with their fitness and nutrition goals. "
-        "This includes creating workout/meal plans, answering questions about exercises, food, nutrition, and logging progress. "
-        "You MUST politely refuse to answer any question that is not related to fitness, diet, or health. "
-        "Do not answer questions about any other topic, no matter how simple it seems. "
-        "For example, if asked about history, programming, or the weather, you must say something like, "
-        "'As a fitness and nutrition coach, I can only answer questions related to those topics.'"
-    ),
-    model=Gemini(
-        model_name="gemini-1.5-flash-latest",
-        api_key=api_key
-    ),
-    tools=[
-        MCPToolset(connection_params=mcp_connection_params)
-    ],
-)
+# Agents are built on demand (by the runner pool, during the API's warmup), not at import time
+def build_fitforge_agent(connection_params=None) -> LlmAgent:
+    """Builds the agent with its own MCP toolset (and therefore its own tool-server connection)."""
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("LLM configuration error: Please set GOOGLE_API_KEY environment variable.")
+    return LlmAgent(
+        name="fitforge_agent",
+        description="A comprehensive AI fitness and nutrition coach.",
+        # --- ADDED: Strict instructions for the agent's persona and scope ---
+        instruction=(
+            "You are FitForge, an expert AI fitness and nutrition coach. "
+            "Your sole purpose is to assist users with their fitness and nutrition goals. "
+            "This includes creating workout/meal plans, answering questions about exercises, food, nutrition, and logging progress. "
+            "You MUST politely refuse to answer any question that is not related to fitness, diet, or health. "
+            "Do not answer questions about any other topic, no matter how simple it seems. "
+            "For example, if asked about history, programming, or the weather, you must say something like, "
+            "'As a fitness and nutrition coach, I can only answer questions related to those topics.'"
+        ),
+        model=Gemini(
+            model_name="gemini-1.5-flash-latest",
+            api_key=api_key
+        ),
+        tools=[
+            MCPToolset(connection_params=connection_params or mcp_connection_params)
+        ],
+        after_tool_callback=compact_tool_response,
+        # Token-budgeted history with a rolling summary, and per-session token totals
+        before_model_callback=manage_context,
+        after_model_callback=count_usage,
+    )
+
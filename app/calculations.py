@@ -0,0 +1,120 @@
+# app/calculations.py
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal
+from .models import UserProfile, WorkoutLog
+
+ACTIVITY_MULTIPLIERS = {"sedentary": 1.2, "lightly_active": 1.375, "moderately_active": 1.55, "very_active": 1.725}
+DEFAULT_ACTIVITY_MULTIPLIER = 1.2
+GOAL_CALORIE_OFFSETS = {"lose_fat": -500.0, "build_muscle": 500.0}
+GENDER_BMR_OFFSETS = {"male": 5.0}
+DEFAULT_BMR_OFFSET = -161.0
+BMI_CATEGORIES = np.array(["Underweight", "Normal weight", "Overweight", "Obese"])
+# Brzycki is only reliable up to 12 reps
+MAX_E1RM_REPS = 12
+
+
+def _lookup(values, table: Dict[str, float], default: float, any_case: bool = False) -> np.ndarray:
+    """Maps an array of labels to numbers with one vectorized comparison per table key.
+
+    (Much cheaper than np.unique, which sorts a million strings.) ``any_case``
+    strips and lowercases the labels first, so " Male" and "mAle" match "male".
+    """
+    values = np.asarray(values)
+    result = np.full(values.shape, default, dtype=float)
+    if not any_case:
+        for key, number in table.items():
+            result[values == key] = number
+        return result
+    stripped = np.char.strip(values.astype(str))
+    lengths = np.char.str_len(stripped)
+    for key, number in table.items():
+        exact = stripped == key
+        result[exact] = number
+        # Lowercasing is the slow part: only rows of the key's length can be another spelling of it
+        candidates = np.flatnonzero((lengths == len(key)) & ~exact)
+        if candidates.size:
+            result[candidates[np.char.lower(stripped[candidates]) == key]] = number
+    return result
+
+
+def _enum_values(values) -> np.ndarray:
+    # Accept enum members (ActivityLevel/Goal) as well as plain strings
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = np.asarray([getattr(v, "value", v) for v in values.ravel()]).reshape(values.shape)
+    return values
+
+
+def bmr(weight_kg, height_cm, age, gender) -> np.ndarray:
+    """Mifflin-St Jeor basal metabolic rate."""
+    weight_kg, height_cm, age = (np.asarray(a, dtype=float) for a in (weight_kg, height_cm, age))
+    offset = _lookup(_enum_values(gender), GENDER_BMR_OFFSETS, DEFAULT_BMR_OFFSET, any_case=True)
+    return (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + offset
+
+
+def tdee_and_macros(weight_kg, height_cm, age, gender, activity_level, goal) -> Dict[str, np.ndarray]:
+    """Columnar TDEE and macro targets. Every argument is an array of the same length."""
+    base = bmr(weight_kg, height_cm, age, gender)
+    tdee = base * _lookup(_enum_values(activity_level), ACTIVITY_MULTIPLIERS, DEFAULT_ACTIVITY_MULTIPLIER)
+    target_calories = tdee + _lookup(_enum_values(goal), GOAL_CALORIE_OFFSETS, 0.0)
+    return {
+        "bmr": base,
+        "tdee": tdee,
+        "calories": np.round(target_calories).astype(np.int64),
+        "protein_g": np.round((target_calories * 0.30) / 4).astype(np.int64),
+        "carbs_g": np.round((target_calories * 0.40) / 4).astype(np.int64),
+        "fat_g": np.round((target_calories * 0.30) / 9).astype(np.int64),
+    }
+
+
+def bmi(weight_kg, height_cm) -> Dict[str, np.ndarray]:
+    """Columnar BMI (1 decimal) and WHO category labels."""
+    height_m = np.asarray(height_cm, dtype=float) / 100
+    value = np.round(np.asarray(weight_kg, dtype=float) / (height_m ** 2), 1)
+    category = BMI_CATEGORIES[np.searchsorted([18.5, 25.0, 30.0], value, side="right")]
+    return {"bmi": value, "category": category}
+
+
+def brzycki_one_rep_max(weight_kg, reps):
+    """Brzycki estimate. Works on numbers, NumPy arrays and SQL column expressions alike."""
+    return weight_kg / (1.0278 - (0.0278 * reps))
+
+
+def one_rep_max(weight_kg, reps) -> np.ndarray:
+    """Columnar estimated 1RM (1 decimal); NaN where reps are outside 1..12."""
+    weight_kg = np.asarray(weight_kg, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    valid = (reps >= 1) & (reps <= MAX_E1RM_REPS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        estimate = np.where(reps == 1, weight_kg, brzycki_one_rep_max(weight_kg, reps))
+    return np.where(valid, np.round(estimate, 1), np.nan)
+
+
+# == Database-backed batch runs (nightly recalculation) ==
+
+async def profile_targets(user_ids: Optional[list] = None) -> Dict[str, np.ndarray]:
+    """BMR/TDEE/macros/BMI for every row of user_profiles (or just ``user_ids``)."""
+    query = select(UserProfile.user_id, UserProfile.weight_kg, UserProfile.height_cm, UserProfile.age, UserProfile.gender, UserProfile.activity_level, UserProfile.goal)
+    if user_ids is not None:
+        query = query.where(UserProfile.user_id.in_(user_ids))
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(query)).all()
+    columns = list(zip(*rows)) if rows else [[]] * 7
+    uid, weight, height, age, gender, activity, goal = (np.asarray(c) for c in columns)
+    return {"user_id": uid, **tdee_and_macros(weight, height, age, gender, activity, goal), **bmi(weight, height)}
+
+
+async def logged_one_rep_maxes(user_id: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Estimated 1RM for every logged set in workout_logs (or one user's sets)."""
+    query = select(WorkoutLog.id, WorkoutLog.user_id, WorkoutLog.exercise_id, WorkoutLog.weight_kg, WorkoutLog.reps)
+    if user_id is not None:
+        query = query.where(WorkoutLog.user_id == user_id)
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(query)).all()
+    columns = list(zip(*rows)) if rows else [[]] * 5
+    log_id, uid, exercise_id, weight, reps = (np.asarray(c) for c in columns)
+    return {"id": log_id, "user_id": uid, "exercise_id": exercise_id, "e1rm_kg": one_rep_max(weight, reps)}
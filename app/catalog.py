@@ -0,0 +1,145 @@
+# app/catalog.py
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal
+from .equipment import ALWAYS_AVAILABLE, equipment_tokens
+from .models import Equipment, Exercise, Food, exercise_equipment
+
+# Reload the catalog after this many seconds (0 = only on explicit refresh/invalidate), so
+# every process (tool server, each API worker) picks up imports and re-seeds on its own
+CATALOG_TTL_SECONDS = float(os.getenv("CATALOG_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class ExerciseRecord:
+    id: int
+    name: str
+    target_muscle: str
+    equipment: str
+    equipment_tokens: FrozenSet[str]
+
+
+@dataclass(frozen=True)
+class FoodRecord:
+    id: int
+    name: str
+    calories_per_100g: float
+    protein_g_per_100g: float
+    carbs_g_per_100g: float
+    fat_g_per_100g: float
+
+
+class CatalogSnapshot:
+    """Immutable set of indexes built from one read of the exercise and food tables."""
+
+    def __init__(self, exercises: List[ExerciseRecord], foods: List[FoodRecord]):
+        self.loaded_at = time.monotonic()
+        self.exercises = sorted(exercises, key=lambda e: e.id)
+        self.foods = sorted(foods, key=lambda f: f.id)
+        self.exercise_by_id: Dict[int, ExerciseRecord] = {e.id: e for e in self.exercises}
+        self.food_by_id: Dict[int, FoodRecord] = {f.id: f for f in self.foods}
+        # Fuzzy name indexes, built on first use by app.name_resolver
+        self.name_indexes: Dict[str, object] = {}
+        # Nutrient matrix for the meal plan solver, built on first use by app.meal_planner
+        self.meal_index: Optional[object] = None
+
+        self.exercise_by_name: Dict[str, ExerciseRecord] = {}
+        self.exercises_by_muscle: Dict[str, List[ExerciseRecord]] = {}
+        # One bit per canonical equipment token, so "doable with" is a single AND per exercise
+        self.equipment_bits: Dict[str, int] = {}
+        self.exercise_masks: Dict[int, int] = {}
+        for e in self.exercises:
+            self.exercise_by_name.setdefault(e.name.lower(), e)
+            self.exercises_by_muscle.setdefault((e.target_muscle or "").lower(), []).append(e)
+            self.exercise_masks[e.id] = self.equipment_mask(e.equipment_tokens - ALWAYS_AVAILABLE, assign=True)
+
+        self.food_by_name: Dict[str, FoodRecord] = {}
+        for f in self.foods:
+            self.food_by_name.setdefault(f.name.lower(), f)
+
+    def find_exercise(self, name: str) -> Optional[ExerciseRecord]:
+        return self.exercise_by_name.get(name.strip().lower())
+
+    def exercises_for(self, target_muscle: str, equipment: Optional[str] = None) -> List[ExerciseRecord]:
+        """Exercises for a muscle whose equipment covers every token in ``equipment``."""
+        exercises = self.exercises_by_muscle.get(target_muscle.strip().lower(), [])
+        wanted = equipment_tokens(equipment)
+        if not wanted:
+            return list(exercises)
+        return [e for e in exercises if wanted <= e.equipment_tokens]
+
+    def equipment_mask(self, tokens: Iterable[str], assign: bool = False) -> int:
+        mask = 0
+        for token in tokens:
+            bit = self.equipment_bits.get(token)
+            if bit is None:
+                if not assign:
+                    continue
+                bit = self.equipment_bits[token] = len(self.equipment_bits)
+            mask |= 1 << bit
+        return mask
+
+    def exercises_doable_with(self, target_muscle: str, available_equipment: Iterable[str]) -> List[ExerciseRecord]:
+        """Exercises for a muscle whose required equipment is a subset of ``available_equipment``."""
+        available = self.equipment_mask(equipment_tokens(list(available_equipment)))
+        return [e for e in self.exercises_by_muscle.get(target_muscle.strip().lower(), []) if self.exercise_masks[e.id] & ~available == 0]
+
+
+class CatalogCache:
+    """Process-wide cache of the static exercise/food catalog written by seed_db.py."""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    async def load(self) -> CatalogSnapshot:
+        """Reads both tables once and atomically swaps in freshly built indexes."""
+        async with AsyncSessionLocal() as db:
+            exercise_rows = (await db.execute(select(Exercise.id, Exercise.name, Exercise.target_muscle, Exercise.equipment))).all()
+            link_rows = (await db.execute(select(exercise_equipment.c.exercise_id, Equipment.name).join(Equipment, Equipment.id == exercise_equipment.c.equipment_id))).all()
+            food_rows = (await db.execute(select(Food.id, Food.name, Food.calories_per_100g, Food.protein_g_per_100g, Food.carbs_g_per_100g, Food.fat_g_per_100g))).all()
+        linked: Dict[int, Set[str]] = {}
+        for exercise_id, equipment_name in link_rows:
+            linked.setdefault(exercise_id, set()).add(equipment_name)
+        # Prefer the normalized links; fall back to parsing the legacy string for unmigrated rows
+        exercises = [ExerciseRecord(r.id, r.name, r.target_muscle or "", r.equipment or "", frozenset(linked[r.id]) if r.id in linked else equipment_tokens(r.equipment)) for r in exercise_rows]
+        foods = [FoodRecord(r.id, r.name, r.calories_per_100g or 0.0, r.protein_g_per_100g or 0.0, r.carbs_g_per_100g or 0.0, r.fat_g_per_100g or 0.0) for r in food_rows]
+        self._snapshot = CatalogSnapshot(exercises, foods)
+        return self._snapshot
+
+    async def get(self) -> CatalogSnapshot:
+        """Returns the current snapshot, loading it on first use or once the TTL has expired."""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._expired(snapshot):
+            return snapshot
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or self._expired(snapshot):
+                snapshot = await self.load()
+            return snapshot
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Forces a reload, e.g. after the catalog tables were re-seeded."""
+        async with self._lock:
+            return await self.load()
+
+    def invalidate(self) -> None:
+        """Drops the current snapshot so the next lookup reloads from the database."""
+        self._snapshot = None
+
+    @staticmethod
+    def _expired(snapshot: CatalogSnapshot) -> bool:
+        return CATALOG_TTL_SECONDS > 0 and time.monotonic() - snapshot.loaded_at > CATALOG_TTL_SECONDS
+
+
+catalog = CatalogCache()
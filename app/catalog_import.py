@@ -0,0 +1,216 @@
+# app/catalog_import.py
+import csv
+import hashlib
+import json
+import math
+import os
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import Exercise, Food, ImportCheckpoint
+
+# Rows per INSERT ... ON CONFLICT statement (and per committed checkpoint)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+# Rejected rows printed per file; the rest are only counted
+MAX_REPORTED_REJECTS = 20
+JSON_READ_CHUNK = 1 << 16
+
+CATALOG_TABLES = {
+    "exercises": (Exercise, {"name": str, "target_muscle": str, "equipment": str, "instructions": str, "video_url": str}),
+    "foods": (Food, {"name": str, "calories_per_100g": float, "protein_g_per_100g": float, "carbs_g_per_100g": float, "fat_g_per_100g": float}),
+}
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    """Streams rows from a .csv, .jsonl/.ndjson or .json (array) file."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if extension == ".csv":
+            yield from csv.DictReader(f)
+        elif extension in (".jsonl", ".ndjson"):
+            yield from (json.loads(line) for line in f if line.strip())
+        elif extension == ".json":
+            yield from iter_json_array(f)
+        else:
+            raise ValueError(f"Unsupported catalog file type: {extension}")
+
+
+def iter_json_array(f: TextIO, chunk_size: int = JSON_READ_CHUNK) -> Iterator:
+    """Yields the elements of a top-level JSON array one at a time, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    buffer, position, started, eof = "", 0, False, False
+    while True:
+        # Skip whitespace, the opening bracket and separators between elements
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] == "," and started):
+            position += 1
+        if position < len(buffer) and not started:
+            if buffer[position] != "[":
+                raise ValueError("A .json catalog file must hold one array of rows (use .jsonl for one row per line).")
+            started, position = True, position + 1
+            continue
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        if position < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                position = end
+                continue
+        if eof:
+            raise ValueError("Unexpected end of file in a .json catalog array.")
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def file_fingerprint(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def normalize_row(kind: str, raw: dict) -> Optional[dict]:
+    """Keeps the known, non-blank columns with the right types; rows without a name are dropped.
+
+    Raises ValueError naming the column when a value cannot be converted.
+    """
+    _, columns = CATALOG_TABLES[kind]
+    if not isinstance(raw, dict):
+        raise ValueError(f"expected an object, got {type(raw).__name__}")
+    row = {}
+    for column, cast in columns.items():
+        value = raw.get(column)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        try:
+            row[column] = cast(value.strip() if isinstance(value, str) else value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{column}: {value!r} is not a valid {cast.__name__}") from None
+        if cast is float and not math.isfinite(row[column]):
+            raise ValueError(f"{column}: {value!r} is not a finite number")
+    return row if row.get("name") else None
+
+
+def normalize_rows(kind: str, raw_rows: Iterable[dict], first_row: int = 1, rejected: Optional[List[str]] = None) -> List[dict]:
+    """normalize_row over a batch; rows that fail are left out and described in ``rejected``."""
+    rows = []
+    for number, raw in enumerate(raw_rows, first_row):
+        try:
+            row = normalize_row(kind, raw)
+        except ValueError as e:
+            if rejected is not None:
+                rejected.append(f"row {number}: {e}")
+            continue
+        if row:
+            rows.append(row)
+    return rows
+
+
+def upsert_rows(session: Session, kind: str, rows: List[dict]) -> int:
+    """Batched INSERT ... ON CONFLICT (name) DO UPDATE of the columns each row supplies. Does not commit.
+
+    A column a row leaves out (or blank) keeps its stored value.
+    """
+    model, _ = CATALOG_TABLES[kind]
+    # Postgres refuses to update the same row twice in one statement: repeats are merged, later values win
+    merged = {}
+    for row in rows:
+        merged[row["name"]] = {**merged.get(row["name"], {}), **row}
+    # Every row of one statement must bind the same columns; executemany then renders
+    # batched multi-row VALUES ("insertmanyvalues") from one cached compiled statement
+    by_columns = {}
+    for row in merged.values():
+        by_columns.setdefault(tuple(sorted(row)), []).append(row)
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    for columns, group in by_columns.items():
+        statement = dialect.insert(model)
+        updates = {c: statement.excluded[c] for c in columns if c != "name"}
+        statement = statement.on_conflict_do_update(index_elements=["name"], set_=updates) if updates else statement.on_conflict_do_nothing(index_elements=["name"])
+        session.execute(statement, group)
+    return len(merged)
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def upsert_catalog(session: Session, kind: str, rows: Iterable[dict], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """Upserts in-memory catalog rows (e.g. the built-in seed data) batch by batch."""
+    total = 0
+    rejected: List[str] = []
+    for batch in _batches(rows, batch_size):
+        total += upsert_rows(session, kind, normalize_rows(kind, batch, rejected=rejected))
+    for reason in rejected:
+        print(f"  Skipped {kind} {reason}")
+    session.commit()
+    return total
+
+
+def print_progress(kind: str, rows_done: int, imported: int, elapsed: float) -> None:
+    print(f"  {kind}: {rows_done:,} rows processed ({imported / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def import_catalog_file(
+    session: Session,
+    kind: str,
+    path: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    force: bool = False,
+    progress: Callable[[str, int, int, float], None] = print_progress,
+) -> dict:
+    """Imports an exercise or food file, resuming after the last committed batch.
+
+    Each batch is upserted and its checkpoint advanced in the same transaction, so
+    an interrupted import restarts exactly where it stopped. Re-running a
+    completed import is a no-op unless ``force`` is set, and a modified file
+    starts over (upserts make re-importing rows harmless).
+    """
+    if kind not in CATALOG_TABLES:
+        raise ValueError(f"Unknown catalog kind '{kind}', expected one of {sorted(CATALOG_TABLES)}")
+    source = f"{kind}:{os.path.abspath(path)}"
+    fingerprint = file_fingerprint(path)
+    checkpoint = session.get(ImportCheckpoint, source)
+    if checkpoint is None or checkpoint.fingerprint != fingerprint or force:
+        checkpoint = session.merge(ImportCheckpoint(source=source, fingerprint=fingerprint, rows_done=0, completed=None))
+        session.commit()
+    elif checkpoint.completed is not None:
+        print(f"{source} already imported on {checkpoint.completed:%Y-%m-%d %H:%M}; use --force to re-import.")
+        return {"source": source, "rows_done": checkpoint.rows_done, "imported": 0, "skipped": True}
+
+    resume_from = checkpoint.rows_done
+    if resume_from:
+        print(f"Resuming {source} after row {resume_from:,}.")
+    start = time.perf_counter()
+    imported = rejected_count = 0
+    rows_done = resume_from
+    for batch in _batches(islice(read_rows(path), resume_from, None), batch_size):
+        rejected: List[str] = []
+        imported += upsert_rows(session, kind, normalize_rows(kind, batch, first_row=rows_done + 1, rejected=rejected))
+        for reason in rejected[:max(0, MAX_REPORTED_REJECTS - rejected_count)]:
+            print(f"  Skipped {reason}")
+        rejected_count += len(rejected)
+        rows_done += len(batch)
+        checkpoint.rows_done = rows_done
+        checkpoint.updated_at = datetime.utcnow()
+        session.commit()
+        progress(kind, rows_done, imported, time.perf_counter() - start)
+
+    checkpoint.completed = datetime.utcnow()
+    session.commit()
+    elapsed = time.perf_counter() - start
+    if rejected_count > MAX_REPORTED_REJECTS:
+        print(f"  ... and {rejected_count - MAX_REPORTED_REJECTS:,} more rejected rows.")
+    return {"source": source, "rows_done": rows_done, "imported": imported, "rejected": rejected_count, "seconds": round(elapsed, 2), "rows_per_second": round(imported / max(elapsed, 1e-9))}
@@ -0,0 +1,9 @@
+# app/config.py
+import os
+
+from dotenv import load_dotenv
+
+# The project root's .env, loaded once for every entry point (API, tool server, scripts)
+# before any module reads its settings from the environment. Real environment variables win.
+ENV_FILE = os.path.join(os.path.dirname(__file__), "..", ".env")
+load_dotenv(dotenv_path=ENV_FILE)
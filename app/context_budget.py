@@ -0,0 +1,187 @@
+# app/context_budget.py
+import json
+import os
+import re
+from typing import List, Optional, Tuple
+
+from google.genai import types as genai_types
+
+from .state_manager import SESSION_MAX_EVENTS
+
+# --- Context Budget Settings ---
+# Estimated tokens of conversation history sent to the model per call; older turns are summarized
+CHAT_CONTEXT_BUDGET_TOKENS = int(os.getenv("CHAT_CONTEXT_BUDGET_TOKENS", "4000"))
+# Cap on the rolling summary of older turns; its oldest lines are dropped beyond this
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "500"))
+# Rough chars-per-token ratio, close enough for budgeting without a tokenizer round-trip
+CHARS_PER_TOKEN = 4
+SUMMARY_USER_CHARS = 160
+SUMMARY_REPLY_CHARS = 200
+
+# Session state keys (persisted with the session, so every worker sees the same summary)
+SUMMARY_KEY = "context_summary"
+SUMMARY_THROUGH_KEY = "context_summary_through"
+CONTEXT_TOKENS_KEY = "context_tokens"
+TRIMMED_TOKENS_KEY = "context_trimmed_tokens"
+USAGE_KEYS = {"prompt_token_count": "usage_prompt_tokens", "candidates_token_count": "usage_output_tokens"}
+
+# Focus line sent with a /chat message in place of the persona, which the agent instruction already has
+MODE_FOCUS = {"diet": "diet and nutrition", "exercise": "exercise and training"}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def chat_text(message: str, mode: Optional[str]) -> str:
+    focus = MODE_FOCUS.get(mode or "")
+    return f"[Focus: {focus}] {message}" if focus else message
+
+
+def estimate_tokens(content: genai_types.Content) -> int:
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call:
+            chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response:
+            chars += len(part.function_response.name or "") + len(json.dumps(part.function_response.response or {}, default=str))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def _is_user_text(content: genai_types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+
+def split_turns(contents: List[genai_types.Content]) -> List[List[genai_types.Content]]:
+    """Groups contents into turns, each starting at a user message, so tool calls stay with their responses."""
+    turns: List[List[genai_types.Content]] = []
+    for content in contents:
+        if _is_user_text(content) or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    first = _SENTENCE_END.split(text, maxsplit=1)[0]
+    return first if len(first) <= limit else first[:limit - 3].rstrip() + "..."
+
+
+def summarize_turn(turn: List[genai_types.Content]) -> str:
+    """One extractive line per turn: the user's request, tools used and the start of the reply."""
+    user = " ".join(p.text for p in turn[0].parts or [] if p.text)
+    tools = [p.function_call.name for c in turn for p in c.parts or [] if p.function_call]
+    replies = [p.text for c in turn if c.role == "model" for p in c.parts or [] if p.text]
+    line = f"- User: {_clip(user, SUMMARY_USER_CHARS)}"
+    if tools:
+        line += f" (tools: {', '.join(dict.fromkeys(tools))})"
+    if replies:
+        line += f" Coach: {_clip(replies[-1], SUMMARY_REPLY_CHARS)}"
+    return line
+
+
+def _cap_summary(lines: List[str]) -> List[str]:
+    budget = CHAT_SUMMARY_MAX_TOKENS * CHARS_PER_TOKEN
+    while lines and sum(len(line) + 1 for line in lines) > budget:
+        lines = lines[1:]
+    return lines
+
+
+def _turn_timestamps(session) -> List[float]:
+    """Start time of every user turn in the session, in the order the turns appear in the request."""
+    return [e.timestamp for e in session.events if e.author == "user" and e.content and _is_user_text(e.content)]
+
+
+def fit_to_budget(turns: List[List[genai_types.Content]], budget: int, max_contents: int) -> Tuple[int, int]:
+    """Index of the first turn kept and the estimated tokens kept; the latest turn is always kept."""
+    kept_tokens, kept_contents, start = 0, 0, len(turns)
+    for i in range(len(turns) - 1, -1, -1):
+        tokens = sum(estimate_tokens(c) for c in turns[i])
+        if start < len(turns) and (kept_tokens + tokens > budget or kept_contents + len(turns[i]) > max_contents):
+            break
+        kept_tokens += tokens
+        kept_contents += len(turns[i])
+        start = i
+    return start, kept_tokens
+
+
+def manage_context(callback_context, llm_request) -> None:
+    """before_model_callback: sliding token window over the history plus a rolling summary.
+
+    Turns that fall out of the window are folded into an extractive summary kept in
+    session state and sent as a system instruction. The window is also held to half
+    of SESSION_MAX_EVENTS, so turns are summarized before the session store deletes them.
+    """
+    state = callback_context.state
+    turns = split_turns(list(llm_request.contents or []))
+    start, kept_tokens = fit_to_budget(turns, CHAT_CONTEXT_BUDGET_TOKENS, max(2, SESSION_MAX_EVENTS // 2))
+    trimmed_tokens = sum(estimate_tokens(c) for turn in turns[:start] for c in turn)
+
+    if start:
+        timestamps = _turn_timestamps(callback_context.session)
+        # Contents and user events line up from the end (the store may already hold fewer old events)
+        offset = len(timestamps) - len(turns)
+        through = state.get(SUMMARY_THROUGH_KEY) or 0.0
+        fresh = [summarize_turn(turn) for i, turn in enumerate(turns[:start])
+                 if 0 <= i + offset < len(timestamps) and timestamps[i + offset] > through]
+        if fresh:
+            lines = (state.get(SUMMARY_KEY) or "").splitlines() + fresh
+            state[SUMMARY_KEY] = "\n".join(_cap_summary(lines))
+            state[SUMMARY_THROUGH_KEY] = timestamps[start - 1 + offset]
+        llm_request.contents = [c for turn in turns[start:] for c in turn]
+
+    summary = state.get(SUMMARY_KEY)
+    if summary:
+        llm_request.append_instructions([f"Summary of the earlier conversation with this user:\n{summary}"])
+    state[CONTEXT_TOKENS_KEY] = kept_tokens + (len(summary) // CHARS_PER_TOKEN if summary else 0)
+    state[TRIMMED_TOKENS_KEY] = trimmed_tokens
+    return None
+
+
+def count_usage(callback_context, llm_response) -> None:
+    """after_model_callback: keeps running per-session token totals from the model's usage metadata."""
+    usage = llm_response.usage_metadata
+    if usage is None or llm_response.partial:
+        return None
+    state = callback_context.state
+    for field, key in USAGE_KEYS.items():
+        state[key] = (state.get(key) or 0) + (getattr(usage, field, None) or 0)
+    state["usage_model_calls"] = (state.get("usage_model_calls") or 0) + 1
+    return None
+
+
+class TokenUsage:
+    """Collects one chat turn's token usage from runner events, on top of the session's earlier totals."""
+
+    def __init__(self, session_state: Optional[dict] = None):
+        session_state = session_state or {}
+        self.session_prompt_tokens = session_state.get(USAGE_KEYS["prompt_token_count"]) or 0
+        self.session_output_tokens = session_state.get(USAGE_KEYS["candidates_token_count"]) or 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.model_calls = 0
+        self.context_tokens: Optional[int] = None
+        self.trimmed_tokens = 0
+
+    def observe(self, event) -> None:
+        usage = event.usage_metadata
+        if usage is not None and not event.partial:
+            self.prompt_tokens += usage.prompt_token_count or 0
+            self.output_tokens += usage.candidates_token_count or 0
+            self.model_calls += 1
+        delta = event.actions.state_delta if event.actions else None
+        if delta:
+            self.context_tokens = delta.get(CONTEXT_TOKENS_KEY, self.context_tokens)
+            self.trimmed_tokens = delta.get(TRIMMED_TOKENS_KEY, self.trimmed_tokens)
+
+    def to_dict(self) -> dict:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "model_calls": self.model_calls,
+            "context_tokens_estimate": self.context_tokens,
+            "trimmed_tokens_estimate": self.trimmed_tokens,
+            "session_prompt_tokens": self.session_prompt_tokens + self.prompt_tokens,
+            "session_output_tokens": self.session_output_tokens + self.output_tokens,
+        }
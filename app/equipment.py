@@ -0,0 +1,73 @@
+# app/equipment.py
+from typing import Dict, FrozenSet
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Equipment, Exercise, exercise_equipment
+
+# Spellings that singular/plural folding alone does not merge
+EQUIPMENT_ALIASES = {
+    "body weight": "bodyweight",
+    "none": "bodyweight",
+    "no equipment": "bodyweight",
+    "pullup bar": "pull-up bar",
+    "pull up bar": "pull-up bar",
+    "cable": "cable machine",
+    "bike": "stationary bike",
+}
+
+# Equipment every user has, so it never disqualifies an exercise
+ALWAYS_AVAILABLE = frozenset({"bodyweight"})
+
+
+def canonical_equipment(name: str) -> str:
+    """Lowercases an equipment name and folds plurals and aliases ("Dumbbells" -> "dumbbell")."""
+    token = " ".join(name.strip().lower().split())
+    token = EQUIPMENT_ALIASES.get(token, token)
+    if token.endswith(("ches", "shes", "xes", "sses")):
+        token = token[:-2]
+    elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return EQUIPMENT_ALIASES.get(token, token)
+
+
+def equipment_tokens(equipment) -> FrozenSet[str]:
+    """Canonical token set for a comma separated string or a list of equipment names."""
+    if not equipment:
+        return frozenset()
+    if isinstance(equipment, str):
+        equipment = equipment.split(",")
+    return frozenset(canonical_equipment(t) for t in equipment if t and t.strip())
+
+
+def display_name(token: str) -> str:
+    return " ".join(w.capitalize() for w in token.split())
+
+
+def link_exercise_equipment(session: Session) -> int:
+    """Brings the exercise/equipment links in line with the legacy ``Exercise.equipment`` strings.
+
+    Creates missing Equipment rows and links, and drops the links of equipment an
+    exercise no longer lists (e.g. after a catalog re-import changed it). Idempotent.
+    Returns the number of links created or removed.
+    """
+    by_name: Dict[str, Equipment] = {e.name: e for e in session.query(Equipment).all()}
+    linked = {(row.exercise_id, row.equipment_id) for row in session.execute(select(exercise_equipment))}
+    wanted = set()
+    for exercise in session.query(Exercise).all():
+        for token in sorted(equipment_tokens(exercise.equipment)):
+            item = by_name.get(token)
+            if item is None:
+                item = Equipment(name=token, display_name=display_name(token))
+                session.add(item)
+                session.flush()
+                by_name[token] = item
+            wanted.add((exercise.id, item.id))
+    added, stale = wanted - linked, linked - wanted
+    if added:
+        session.execute(exercise_equipment.insert(), [{"exercise_id": e, "equipment_id": q} for e, q in sorted(added)])
+    for exercise_id, equipment_id in stale:
+        session.execute(exercise_equipment.delete().where(exercise_equipment.c.exercise_id == exercise_id, exercise_equipment.c.equipment_id == equipment_id))
+    session.commit()
+    return len(added) + len(stale)
@@ -0,0 +1,211 @@
+# app/fast_path.py
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import tools as fitforge_tools
+from .tool_results import FoodMacros
+
+# --- Chat Fast Path Settings ---
+# Answer plain BMI / one-rep max / food macro questions locally instead of running the agent
+CHAT_FAST_PATH_ENABLED = os.getenv("CHAT_FAST_PATH_ENABLED", "true").lower() == "true"
+# Share of the message's words a match must account for; anything else ("is that healthy?") goes to the agent
+CHAT_FAST_PATH_MIN_COVERAGE = float(os.getenv("CHAT_FAST_PATH_MIN_COVERAGE", "0.85"))
+MAX_MESSAGE_CHARS = 160
+# Lighter "lifts" are almost always set/rep counts or typos, not a load worth a 1RM estimate
+MIN_LIFT_KG = 2.5
+LB_TO_KG = 0.45359237
+OZ_TO_G = 28.349523
+# Weight of the newest agent turn in the running average used to estimate time saved
+AGENT_LATENCY_EMA = 0.1
+
+NUMBER = r"(\d+(?:\.\d+)?)"
+WEIGHT = re.compile(NUMBER + r"\s*(kg|kgs|kilos?|kilograms?|lbs?|pounds?)\b")
+HEIGHT_CM = re.compile(NUMBER + r"\s*(?:cm|centimet(?:er|re)s?)\b")
+HEIGHT_M = re.compile(r"\b([12](?:\.\d+)?)\s*(?:m|met(?:er|re)s?)\b")
+HEIGHT_FT = re.compile(r"\b([4-7])\s*(?:ft|foot|feet|')\s*(?:(\d{1,2})\s*(?:in|inch(?:es)?|\")?)?")
+LIFT = re.compile(NUMBER + r"\s*(kg|kgs|kilos?|lbs?|pounds?)?\s*(?:x|×|\*|for)\s*(\d{1,2})\b(?:\s*reps?\b)?")
+REPS_AT = re.compile(r"\b(\d{1,2})\s*reps?\s*(?:at|with|of|@)\s*" + NUMBER + r"\s*(kg|kgs|kilos?|lbs?|pounds?)?")
+AMOUNT = re.compile(NUMBER + r"\s*(g|grams?|gr|oz|ounces?)\b")
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+ONE_REP_MAX = re.compile(r"\b1\s?rm\b|\be1rm\b|one[\s-]rep[\s-]max")
+
+INTENTS = {
+    "bmi": re.compile(r"\bbmi\b|body mass index"),
+    # A bare "max" only counts together with a weight unit, checked in _one_rep_max
+    "one_rep_max": re.compile(ONE_REP_MAX.pattern + r"|\bmax\b"),
+    "food_macros": re.compile(r"\b(?:macros?|macronutrients?|calories|kcal|protein|carbs?|fats?|nutrition(?:al)?)\b"),
+}
+INTENT_WORDS = {
+    "bmi": {"bmi", "body", "mass", "index", "tall", "weigh", "weight", "height"},
+    "one_rep_max": {"1rm", "rm", "e1rm", "one", "rep", "reps", "max", "estimated", "lift", "lifted", "lifting", "did", "do", "bench", "squat", "deadlift", "press"},
+    "food_macros": {"macros", "macro", "macronutrients", "calories", "kcal", "protein", "carbs", "carb", "fat", "fats", "nutrition", "nutritional", "info", "breakdown"},
+}
+FILLER = {
+    "what", "what's", "whats", "is", "are", "my", "the", "a", "an", "of", "in", "for", "at", "with", "and", "i", "i'm", "im", "am",
+    "me", "please", "calculate", "estimate", "compute", "tell", "give", "show", "get", "find", "how", "much", "many", "there",
+    "does", "do", "have", "has", "contain", "contains", "can", "you", "it", "if", "would", "be", "to", "pls", "hey", "hi", "quick",
+}
+
+
+@dataclass
+class FastAnswer:
+    intent: str
+    text: str
+
+
+def _coverage(text: str, removed: List[Tuple[int, int]], intent: str) -> float:
+    """Share of the message's words explained by the slots, the intent's keywords and filler."""
+    total = len(WORD.findall(text))
+    for start, end in sorted(removed, reverse=True):
+        text = text[:start] + " " + text[end:]
+    known = FILLER | INTENT_WORDS[intent]
+    unexplained = sum(1 for word in WORD.findall(text) if word not in known)
+    return (total - unexplained) / max(total, 1)
+
+
+def _kg(value: float, unit: Optional[str]) -> float:
+    return value * LB_TO_KG if unit and unit.startswith(("lb", "pound")) else value
+
+
+def _bmi(text: str) -> Optional[FastAnswer]:
+    weight = WEIGHT.search(text)
+    height = HEIGHT_CM.search(text) or HEIGHT_M.search(text) or HEIGHT_FT.search(text)
+    if not weight or not height:
+        return None
+    weight_kg = _kg(float(weight.group(1)), weight.group(2))
+    if height.re is HEIGHT_CM:
+        height_cm = float(height.group(1))
+    elif height.re is HEIGHT_M:
+        height_cm = float(height.group(1)) * 100
+    else:
+        height_cm = (int(height.group(1)) * 12 + int(height.group(2) or 0)) * 2.54
+    if not (25 <= weight_kg <= 350 and 100 <= height_cm <= 250):
+        return None
+    if _coverage(text, [weight.span(), height.span()], "bmi") < CHAT_FAST_PATH_MIN_COVERAGE:
+        return None
+    return FastAnswer("bmi", fitforge_tools.calculate_bmi(round(weight_kg, 1), round(height_cm, 1)).to_prose())
+
+
+def _one_rep_max(text: str) -> Optional[FastAnswer]:
+    lift = LIFT.search(text)
+    if lift:
+        weight, unit, reps = float(lift.group(1)), lift.group(2), int(lift.group(3))
+    else:
+        lift = REPS_AT.search(text)
+        if not lift:
+            return None
+        reps, weight, unit = int(lift.group(1)), float(lift.group(2)), lift.group(3)
+    # The tool answers in kg; a pound-based question is left to the agent
+    if unit and not unit.startswith("k") or not (MIN_LIFT_KG <= weight <= 500 and reps > 0):
+        return None
+    # "3 x 10 at max" is a set scheme: a unitless number needs an explicit 1RM question
+    if not unit and not ONE_REP_MAX.search(text):
+        return None
+    if _coverage(text, [lift.span()], "one_rep_max") < CHAT_FAST_PATH_MIN_COVERAGE:
+        return None
+    return FastAnswer("one_rep_max", fitforge_tools.estimate_one_rep_max(weight, reps).to_prose())
+
+
+def _food_phrase(words: List[str], skip: Set[str]) -> str:
+    while words and words[0] in skip:
+        words = words[1:]
+    while words and words[-1] in skip:
+        words = words[:-1]
+    return " ".join(words)
+
+
+async def _food_macros(text: str) -> Optional[FastAnswer]:
+    amounts = list(AMOUNT.finditer(text))
+    # Several amounts means a meal; calculate_meal_macros through the agent handles those
+    if len(amounts) != 1 or " and " in text[amounts[0].end():]:
+        return None
+    amount = amounts[0]
+    grams = float(amount.group(1)) * (OZ_TO_G if amount.group(2).startswith(("oz", "ounce")) else 1.0)
+    skip = FILLER | INTENT_WORDS["food_macros"]
+    after = re.split(r"[?.!,;]", text[amount.end():], maxsplit=1)[0]
+    phrase = _food_phrase(WORD.findall(after), skip) or _food_phrase(WORD.findall(re.split(r"[?.!,;]", text[:amount.start()])[-1]), skip)
+    if not phrase or not (0 < grams <= 5000):
+        return None
+    start = text.find(phrase)
+    spans = [amount.span()] + ([(start, start + len(phrase))] if start >= 0 else [])
+    if _coverage(text, spans, "food_macros") < CHAT_FAST_PATH_MIN_COVERAGE:
+        return None
+    result = await fitforge_tools.get_macronutrients_for_food(phrase, round(grams, 1))
+    # Only a confident match is answered directly; guesses go to the agent, which can ask
+    if not isinstance(result, FoodMacros) or result.closest is not None:
+        return None
+    return FastAnswer("food_macros", result.to_prose())
+
+
+async def match(message: str) -> Optional[FastAnswer]:
+    """The local answer to a single calculator-style question, or None to run the agent."""
+    text = " ".join(message.lower().split())
+    if not text or len(text) > MAX_MESSAGE_CHARS:
+        return None
+    intents = [name for name, pattern in INTENTS.items() if pattern.search(text)]
+    # Exactly one intent: "my BMI and my bench max" is two questions for the agent
+    if len(intents) != 1:
+        return None
+    if intents[0] == "bmi":
+        return _bmi(text)
+    if intents[0] == "one_rep_max":
+        return _one_rep_max(text)
+    return await _food_macros(text)
+
+
+async def record_turn(runner, session, user_message, answer: str) -> None:
+    """Appends the question and the local answer to the session, so the agent sees them in later turns."""
+    # Imported here: the agent stack is loaded by the API's warmup, after this module
+    from google.adk.events import Event
+    from google.genai import types as genai_types
+
+    invocation_id = f"fast-{uuid.uuid4().hex}"
+    await runner.session_service.append_event(session, Event(invocation_id=invocation_id, author="user", content=user_message))
+    reply = genai_types.Content(role="model", parts=[genai_types.Part(text=answer)])
+    await runner.session_service.append_event(session, Event(invocation_id=invocation_id, author=runner.agent.name, content=reply))
+
+
+class FastPathStats:
+    """Hit rate of the fast path, and time saved against a running average of agent turns."""
+
+    def __init__(self):
+        self.hits: Dict[str, int] = {name: 0 for name in INTENTS}
+        self.misses = 0
+        self.fast_seconds = 0.0
+        self.saved_seconds = 0.0
+        self.agent_turn_seconds: Optional[float] = None
+
+    def hit(self, intent: str, seconds: float) -> None:
+        self.hits[intent] += 1
+        self.fast_seconds += seconds
+        # Until an agent turn has been timed there is nothing to compare against
+        if self.agent_turn_seconds is not None:
+            self.saved_seconds += max(0.0, self.agent_turn_seconds - seconds)
+
+    def miss(self) -> None:
+        self.misses += 1
+
+    def agent_turn(self, seconds: float) -> None:
+        previous = self.agent_turn_seconds
+        self.agent_turn_seconds = seconds if previous is None else previous + AGENT_LATENCY_EMA * (seconds - previous)
+
+    def snapshot(self) -> dict:
+        hits = sum(self.hits.values())
+        total = hits + self.misses
+        return {
+            "enabled": CHAT_FAST_PATH_ENABLED,
+            "hits": hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "hits_by_intent": dict(self.hits),
+            "avg_fast_ms": round(self.fast_seconds / hits * 1000, 2) if hits else None,
+            "avg_agent_ms": round(self.agent_turn_seconds * 1000, 1) if self.agent_turn_seconds is not None else None,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+fast_path_stats = FastPathStats()
+
@@ -0,0 +1,168 @@
+# app/ingest.py
+import json
+import os
+from datetime import datetime, timezone
+from typing import Annotated, AsyncIterable, AsyncIterator, Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+from sqlalchemy import insert, select
+
+from .database import AsyncSessionLocal
+from .models import User, WeightLog, WorkoutLog
+from .name_resolver import resolve_exercise
+from . import rollups
+
+# Rows are validated, resolved and inserted this many at a time (all in one transaction)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "2000"))
+# Keep the response bounded even for a badly broken import
+MAX_REPORTED_REJECTS = 1000
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Log dates are stored as naive UTC, like datetime.utcnow() in the models
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class WorkoutEntry(BaseModel):
+    type: Literal["workout"]
+    user_id: int
+    exercise_name: str
+    sets: int = Field(gt=0)
+    reps: int = Field(gt=0)
+    weight_kg: float = Field(ge=0)
+    date: Optional[datetime] = None
+
+    _normalize_date = field_validator("date")(_naive_utc)
+
+
+class WeightEntry(BaseModel):
+    type: Literal["weight"]
+    user_id: int
+    weight_kg: float = Field(gt=0)
+    date: Optional[datetime] = None
+
+    _normalize_date = field_validator("date")(_naive_utc)
+
+
+IngestEntry = TypeAdapter(Annotated[Union[WorkoutEntry, WeightEntry], Field(discriminator="type")])
+
+
+class IngestReport:
+    def __init__(self):
+        self.workouts = 0
+        self.weights = 0
+        self.rejected: List[dict] = []
+        self.rejected_count = 0
+
+    def reject(self, row: int, error: str) -> None:
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_REJECTS:
+            self.rejected.append({"row": row, "error": error})
+
+    def to_dict(self) -> dict:
+        return {
+            "accepted": self.workouts + self.weights,
+            "workouts": self.workouts,
+            "weights": self.weights,
+            "rejected_count": self.rejected_count,
+            "rejected": self.rejected,
+        }
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Union[dict, Exception]]]:
+    """Yields (row number, parsed object or parse error) from a streamed NDJSON body."""
+    buffer = b""
+    row = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield row, _parse_line(line)
+                row += 1
+    if buffer.strip():
+        yield row, _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> Union[dict, Exception]:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def _aiter(rows: Iterable) -> AsyncIterator:
+    for row in rows:
+        yield row
+
+
+async def ingest_entries(rows: Union[Iterable[dict], AsyncIterable[Tuple[int, Union[dict, Exception]]]]) -> dict:
+    """Validates and bulk-inserts workout/weight entries in a single transaction.
+
+    ``rows`` is either a list of dicts or the output of ``iter_ndjson``. Invalid
+    rows, unknown exercises and unknown users are reported per row instead of
+    failing the import.
+    """
+    if not hasattr(rows, "__aiter__"):
+        rows = _aiter(enumerate(rows))
+    report = IngestReport()
+    exercise_ids: Dict[str, Tuple[Optional[int], str]] = {}
+    user_ids: Dict[int, bool] = {}
+    async with AsyncSessionLocal() as db:
+        batch: List[Tuple[int, Union[WorkoutEntry, WeightEntry]]] = []
+        async for row, raw in rows:
+            if isinstance(raw, Exception):
+                report.reject(row, f"invalid JSON: {raw}")
+                continue
+            try:
+                batch.append((row, IngestEntry.validate_python(raw)))
+            except ValidationError as e:
+                report.reject(row, "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()))
+            if len(batch) >= INGEST_BATCH_SIZE:
+                await _write_batch(db, batch, exercise_ids, user_ids, report)
+                batch = []
+        if batch:
+            await _write_batch(db, batch, exercise_ids, user_ids, report)
+        await db.commit()
+    return report.to_dict()
+
+
+async def _write_batch(db, batch, exercise_ids: Dict[str, Tuple[Optional[int], str]], user_ids: Dict[int, bool], report: IngestReport) -> None:
+    # Resolve every not-yet-seen exercise name once (fuzzy, same rules as log_workout) and users with one query
+    new_names = {e.exercise_name.strip().lower() for _, e in batch if isinstance(e, WorkoutEntry)} - exercise_ids.keys()
+    for name in new_names:
+        resolution = await resolve_exercise(name)
+        if resolution.confident:
+            exercise_ids[name] = (resolution.best.record.id, "")
+        else:
+            exercise_ids[name] = (None, f"; closest matches: {resolution.suggestions()}" if resolution.matches else "")
+    new_users = {e.user_id for _, e in batch} - user_ids.keys()
+    if new_users:
+        existing = set((await db.execute(select(User.id).where(User.id.in_(new_users)))).scalars())
+        user_ids.update({uid: uid in existing for uid in new_users})
+
+    now = datetime.utcnow()
+    workout_rows, weight_rows = [], []
+    for row, entry in batch:
+        if not user_ids[entry.user_id]:
+            report.reject(row, f"unknown user_id {entry.user_id}")
+        elif isinstance(entry, WorkoutEntry):
+            exercise_id, hint = exercise_ids[entry.exercise_name.strip().lower()]
+            if exercise_id is None:
+                report.reject(row, f"Exercise '{entry.exercise_name}' not found{hint}.")
+                continue
+            workout_rows.append({"user_id": entry.user_id, "exercise_id": exercise_id, "sets": entry.sets, "reps": entry.reps, "weight_kg": entry.weight_kg, "date": entry.date or now})
+        else:
+            weight_rows.append({"user_id": entry.user_id, "weight_kg": entry.weight_kg, "date": entry.date or now})
+
+    # executemany: batched multi-row INSERTs on every driver
+    if workout_rows:
+        await db.execute(insert(WorkoutLog), workout_rows)
+        await rollups.record_workouts(db, workout_rows)
+        report.workouts += len(workout_rows)
+    if weight_rows:
+        await db.execute(insert(WeightLog), weight_rows)
+        await rollups.record_weights(db, weight_rows)
+        report.weights += len(weight_rows)
@@ -0,0 +1,167 @@
+# app/jobs.py
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import select, update
+
+from .database import AsyncSessionLocal, async_engine
+from .models import PlanJob
+from .planning import PlanRequest
+
+# --- Plan Job Settings ---
+PLAN_JOB_WORKERS = int(os.getenv("PLAN_JOB_WORKERS", "2"))
+PLAN_JOB_MAX_ATTEMPTS = int(os.getenv("PLAN_JOB_MAX_ATTEMPTS", "3"))
+# How often idle workers look for jobs queued by other processes
+PLAN_JOB_POLL_SECONDS = float(os.getenv("PLAN_JOB_POLL_SECONDS", "2"))
+# A running job without a heartbeat for this long belonged to a dead process and is requeued
+PLAN_JOB_STALE_SECONDS = float(os.getenv("PLAN_JOB_STALE_SECONDS", "300"))
+HEARTBEAT_SECONDS = 30
+
+
+def job_to_dict(job: PlanJob) -> dict:
+    result = {"job_id": job.id, "status": job.status, "attempts": job.attempts, "created_at": job.created_at, "started_at": job.started_at, "finished_at": job.finished_at}
+    if job.status == "succeeded":
+        result["plan"] = job.plan
+    if job.error:
+        result["error"] = job.error
+    return result
+
+
+class JobManager:
+    """Runs /generate-plan?async=true jobs on a fixed number of asyncio workers.
+
+    Jobs live in the plan_jobs table, so every API process can report on any
+    job, and a job claimed by a process that died is picked up again once its
+    heartbeat goes stale. Claims are a conditional UPDATE, safe across workers
+    on both Postgres and SQLite.
+    """
+
+    def __init__(self, run_plan: Callable[[PlanRequest], Awaitable[str]], workers: int = PLAN_JOB_WORKERS):
+        self.run_plan = run_plan
+        self.workers = max(1, workers)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._last_reap = datetime.min
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "retried": 0}
+
+    async def start(self) -> None:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: PlanJob.__table__.create(sync_conn, checkfirst=True))
+        resumed = await self.requeue_stale()
+        if resumed:
+            print(f"Resuming {resumed} plan job(s) left unfinished by a previous run.")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Hand our unfinished jobs straight back to the queue instead of waiting for them to go stale
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(PlanJob).where(PlanJob.status == "running", PlanJob.worker == self.worker_id).values(status="queued", worker=None))
+            await db.commit()
+
+    async def submit(self, request: PlanRequest, plan: Optional[str] = None) -> dict:
+        """Queues a job; a plan that is already known (cache hit) is stored as finished right away."""
+        now = datetime.utcnow()
+        job = PlanJob(id=uuid.uuid4().hex, status="queued", request=request.model_dump_json(), attempts=0, created_at=now)
+        if plan is not None:
+            job.status, job.plan, job.finished_at = "succeeded", plan, now
+        async with AsyncSessionLocal() as db:
+            db.add(job)
+            await db.commit()
+        self.stats["submitted"] += 1
+        self._wakeup.set()
+        return job_to_dict(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(PlanJob, job_id)
+            return job_to_dict(job) if job else None
+
+    async def requeue_stale(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=PLAN_JOB_STALE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(PlanJob).where(PlanJob.status == "running", PlanJob.heartbeat_at < cutoff).values(status="queued", worker=None)
+            )
+            await db.commit()
+        self._last_reap = datetime.utcnow()
+        return result.rowcount or 0
+
+    async def _claim(self) -> Optional[PlanJob]:
+        """Oldest queued job, claimed with UPDATE ... WHERE status='queued' so only one worker wins."""
+        async with AsyncSessionLocal() as db:
+            while True:
+                job_id = (await db.execute(select(PlanJob.id).where(PlanJob.status == "queued").order_by(PlanJob.created_at).limit(1))).scalar()
+                if job_id is None:
+                    return None
+                now = datetime.utcnow()
+                claimed = await db.execute(
+                    update(PlanJob).where(PlanJob.id == job_id, PlanJob.status == "queued")
+                    .values(status="running", worker=self.worker_id, started_at=now, heartbeat_at=now, attempts=PlanJob.attempts + 1)
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    return await db.get(PlanJob, job_id, populate_existing=True)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                if (datetime.utcnow() - self._last_reap).total_seconds() > PLAN_JOB_STALE_SECONDS / 2:
+                    await self.requeue_stale()
+                job = await self._claim()
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=PLAN_JOB_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Plan job worker error: {e}")
+                await asyncio.sleep(PLAN_JOB_POLL_SECONDS)
+
+    async def _run(self, job: PlanJob) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            plan = await self.run_plan(PlanRequest.model_validate_json(job.request))
+            values = {"status": "succeeded", "plan": plan, "error": None, "finished_at": datetime.utcnow()}
+            self.stats["succeeded"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Plan job {job.id} failed (attempt {job.attempts}): {e}")
+            if job.attempts < PLAN_JOB_MAX_ATTEMPTS:
+                values = {"status": "queued", "worker": None, "error": str(e)}
+                self.stats["retried"] += 1
+            else:
+                values = {"status": "failed", "error": str(e), "finished_at": datetime.utcnow()}
+                self.stats["failed"] += 1
+        finally:
+            heartbeat.cancel()
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(PlanJob).where(PlanJob.id == job.id, PlanJob.worker == self.worker_id).values(**values))
+            await db.commit()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(update(PlanJob).where(PlanJob.id == job_id, PlanJob.worker == self.worker_id).values(heartbeat_at=datetime.utcnow()))
+                    await db.commit()
+            except Exception as e:
+                print(f"Plan job {job_id} heartbeat failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {"workers": len(self._tasks), **self.stats}
@@ -1,96 +1,350 @@
+import asyncio
 import logging
 import os
+import time
+from contextlib import aclosing, asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.datastructures import Headers, MutableHeaders
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Optional
 
-from .models import ActivityLevel, Goal
-from .agent import fitforge_agent
-
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types as genai_types
+from . import config  # loads .env before any setting is read
+from .planning import PlanRequest, build_plan_prompt, precompute_plan_context
+from .catalog import catalog
+from .meal_planner import MealPlanRequest, solve_meal_plan
+from .tool_results import MealPlan
+from .plan_cache import PLAN_CACHE_ENABLED, plan_cache, plan_cache_key
+from .admission import AdmissionLimiter, AdmissionRejected, SingleFlight, message_key
+from .jobs import JobManager
+from .fast_path import CHAT_FAST_PATH_ENABLED, fast_path_stats, match as match_fast_path, record_turn
+from .ingest import ingest_entries, iter_ndjson
+from .static_assets import StaticSite
+from .database import DB_POOL_SIZE, async_engine
+from .warmup import WARMUP_RETRY_AFTER_SECONDS, Warmup
+from .telemetry import (
+    PROMETHEUS_CONTENT_TYPE, REQUEST_ID_HEADER, end_request_trace, http_request_duration,
+    metrics, new_request_id, request_id_var, server_timing, start_request_trace, trace_agent_events,
+)
 
 # Configure logging
 logging.getLogger("google.adk").setLevel(logging.ERROR)
+logger = logging.getLogger(__name__)
+
+# Pooled database connections opened by the warmup, so the first requests don't pay for connecting
+WARMUP_DB_CONNECTIONS = min(DB_POOL_SIZE, int(os.getenv("WARMUP_DB_CONNECTIONS", "2")))
+
+# The agent stack (google-adk pulls in vertexai and takes seconds to import) is loaded by
+# the warmup, not at import time; these names are bound by load_agent_stack()
+session_service = None
+runner_pool = None
+
+def load_agent_stack() -> None:
+    """Imports the agent modules and builds the session store and runner pool (in a worker thread)."""
+    global genai_types, SSE_HEADERS, format_sse, stream_agent_events, TokenUsage, chat_text, session_service, runner_pool
+    from google.genai import types as genai_types
+    from .context_budget import TokenUsage, chat_text
+    from .mcp_pool import RunnerPool
+    from .state_manager import build_session_service
+    from .streaming import SSE_HEADERS, format_sse, stream_agent_events
+    # The session store is shared (Postgres by default), so any worker can serve any session_id
+    session_service = build_session_service()
+    # Several runners, each with its own connection to the MCP tool server
+    runner_pool = RunnerPool(
+        app_name="fitforge_agent_app",
+        session_service=session_service,
+    )
+    # google-genai's pydantic models build their validators on first use (100+ ms); not in a request
+    from google.adk.events import Event
+    Event(invocation_id="warmup", author="user", content=genai_types.Content(role="user", parts=[genai_types.Part(text="")]))
+
+async def warm_agent_stack():
+    await asyncio.to_thread(load_agent_stack)
+
+async def warm_database():
+    async def ping():
+        async with async_engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+    # Held at the same time, so the pool really ends up with this many connections
+    await asyncio.gather(*(ping() for _ in range(max(1, WARMUP_DB_CONNECTIONS))))
+
+async def warm_tool_server():
+    # Lists the tools on every pooled connection: spawns (stdio) or connects to (HTTP) the tool server
+    await asyncio.gather(*(toolset.get_tools() for toolset in runner_pool.toolsets()))
+
+async def start_background_tasks():
+    from .state_manager import evict_expired_sessions_forever
+    await job_manager.start()
+    app.state.session_evictor = asyncio.create_task(evict_expired_sessions_forever(session_service, "fitforge_agent_app"))
+    app.state.mcp_health_monitor = asyncio.create_task(runner_pool.monitor_health())
+
+warmup = Warmup([
+    ("agent", warm_agent_stack),
+    ("database", warm_database),
+    ("catalog", catalog.load),
+    ("tools", warm_tool_server),
+    ("background", start_background_tasks),
+])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup returns right away; /healthz answers while the warmup runs and /readyz once it is done
+    warmup.start()
+    try:
+        yield
+    finally:
+        await warmup.stop()
+        for name in ("session_evictor", "mcp_health_monitor"):
+            task = getattr(app.state, name, None)
+            if task is not None:
+                task.cancel()
+        if "background" in warmup.timings:
+            await job_manager.stop()
+        if runner_pool is not None:
+            await runner_pool.close()
 
 # Initialize FastAPI app
-app = FastAPI(title="FitForge Agent API")
+app = FastAPI(title="FitForge Agent API", lifespan=lifespan)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/frontend/static"), name="static")
+# Frontend pages and assets: fingerprinted, precompressed and served from memory
+static_site = StaticSite().load()
+app.mount("/static", static_site, name="static")
 
-# Initialize session service and runner
-session_service = InMemorySessionService()
-runner = Runner(
-    agent=fitforge_agent,
-    app_name="fitforge_agent_app",
-    session_service=session_service,
-)
+async def agent_ready():
+    """Dependency of the agent endpoints: waits out a warmup in progress, 503 if it does not finish."""
+    if not await warmup.wait():
+        detail = f"Warmup failed ({warmup.error})." if warmup.error else "Service is warming up."
+        raise AdmissionRejected(503, detail, WARMUP_RETRY_AFTER_SECONDS)
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and its event loop is responsive."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the warmup has finished and the tool server is reachable."""
+    ready = warmup.ready.is_set() and runner_pool is not None and runner_pool.healthy
+    body = {"status": "ready" if ready else "not_ready", **warmup.snapshot()}
+    if runner_pool is not None and not runner_pool.healthy:
+        body["tool_server_error"] = runner_pool.last_health_error
+    return JSONResponse(body, status_code=200 if ready else 503)
 
-# Request model for plan generation
-class PlanRequest(BaseModel):
-    age: int
-    weight_kg: float
-    height_cm: float
-    gender: str
-    activity_level: ActivityLevel
-    goal: Goal
-    available_equipment: List[str]
-    days_per_week: int
-
-@app.post("/generate-plan")
-async def generate_plan(request: PlanRequest):
-    prompt = f"""
-    Please act as an expert fitness and nutrition coach.
-    A new client has provided the following profile and needs a comprehensive fitness and meal plan.
-
-    **Client Profile:**
-    - **Goal:** {request.goal.value}
-    - **Experience / Activity Level:** {request.activity_level.value}
-    - **Workouts Per Week:** {request.days_per_week}
-    - **Available Equipment:** {', '.join(request.available_equipment) if request.available_equipment else 'Bodyweight only'}
-    - **Age:** {request.age}
-    - **Gender:** {request.gender}
-    - **Weight:** {request.weight_kg} kg
-    - **Height:** {request.height_cm} cm
-
-    Your Task:
-    1. First, calculate the user's daily energy and macronutrient needs.
-    2. Based on those needs, create a detailed, sample one-day meal plan.
-    3. Create a detailed, {request.days_per_week}-day workout plan tailored to their goal and equipment.
-    4. Combine everything into a single, encouraging, and easy-to-read report.
+class RequestTracingMiddleware:
+    """Tags every request with an X-Request-ID and records its latency (until headers) per route.
+
+    Plain ASGI rather than @app.middleware("http"): that runs each request in a
+    task group, which breaks the anyio scopes the MCP client opens inside a request.
     """
 
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_id = new_request_id(Headers(scope=scope).get(REQUEST_ID_HEADER))
+        tokens = start_request_trace(request_id)
+        start = time.perf_counter()
+        status = None
+
+        def observe(code: int) -> None:
+            route = scope.get("route")
+            http_request_duration.observe(time.perf_counter() - start, method=scope["method"], route=getattr(route, "path", "unmatched"), status=code)
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                # Model/tool time of non-streaming agent runs (streams send headers before the run)
+                timing = server_timing()
+                if timing:
+                    headers["Server-Timing"] = timing
+                observe(status)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if status is None:
+                observe(500)
+            end_request_trace(tokens)
+
+app.add_middleware(RequestTracingMiddleware)
+
+# Admission control: each endpoint family gets a concurrency cap and a bounded wait queue
+plan_limiter = AdmissionLimiter.from_env("plan", max_concurrent=4, max_waiting=16)
+chat_limiter = AdmissionLimiter.from_env("chat", max_concurrent=16, max_waiting=64)
+# Identical in-flight requests share one agent run
+plan_flights = SingleFlight()
+chat_flights = SingleFlight()
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers={"Retry-After": str(exc.retry_after)})
+
+async def release_after_stream(stream, release):
+    """Holds an admission slot for as long as an SSE stream is being sent."""
     try:
-        session = await session_service.create_session(
-            app_name="fitforge_agent_app", user_id="api_user"
-        )
+        async for frame in stream:
+            yield frame
+    finally:
+        release()
 
-        user_message = genai_types.Content(
-            role="user", parts=[genai_types.Part(text=prompt)]
-        )
+def admitted_stream(stream, release) -> StreamingResponse:
+    # The background task also releases the slot if the stream never started
+    return StreamingResponse(
+        release_after_stream(stream, release),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(release),
+    )
+
+NO_FINAL_RESPONSE = "[Agent did not produce a final response]"
+
+async def cache_plan(request: PlanRequest, plan: str) -> None:
+    if PLAN_CACHE_ENABLED and plan != NO_FINAL_RESPONSE:
+        await plan_cache.put(request, plan)
 
-        final_response = "[Agent did not produce a final response]"
+async def run_plan_agent(request: PlanRequest) -> str:
+    # Macros, BMI and the exercise pool are computed locally, saving agent tool round-trips
+    prompt = build_plan_prompt(request, await precompute_plan_context(request))
 
-        async for event in runner.run_async(
-            user_id=session.user_id,
-            session_id=session.id,
-            new_message=user_message,
-        ):
+    session = await session_service.create_session(
+        app_name="fitforge_agent_app", user_id="api_user"
+    )
+
+    user_message = genai_types.Content(
+        role="user", parts=[genai_types.Part(text=prompt)]
+    )
+
+    final_response = NO_FINAL_RESPONSE
+
+    runner = await runner_pool.acquire()
+    events = runner.run_async(
+        user_id=session.user_id,
+        session_id=session.id,
+        new_message=user_message,
+    )
+    async with aclosing(trace_agent_events(events, "/generate-plan")) as traced:
+        async for event in traced:
             if event.is_final_response() and event.content and event.content.parts:
                 final_response = event.content.parts[0].text
                 break
 
+    await cache_plan(request, final_response)
+    return final_response
+
+async def run_plan_job(request: PlanRequest) -> str:
+    # Background jobs are capped by the job worker count, and still share runs with live requests
+    plan = await plan_flights.run(plan_cache_key(request), lambda: run_plan_agent(request))
+    if plan == NO_FINAL_RESPONSE:
+        # Not a plan: let the job manager retry (or fail) the job instead of storing the placeholder
+        raise RuntimeError("The agent did not produce a final response.")
+    return plan
+
+job_manager = JobManager(run_plan_job)
+
+@app.post("/generate-plan", dependencies=[Depends(agent_ready)])
+async def generate_plan(request: PlanRequest, async_mode: bool = Query(False, alias="async")):
+    try:
+        # Near-identical profiles share one generated plan
+        cached_plan = await plan_cache.get(request) if PLAN_CACHE_ENABLED else None
+        if async_mode:
+            # Respond right away; the plan is fetched later from GET /jobs/{job_id}
+            job = await job_manager.submit(request, plan=cached_plan)
+            return JSONResponse(jsonable_encoder({**job, "status_url": f"/jobs/{job['job_id']}"}), status_code=202)
+        if cached_plan is not None:
+            return {"plan": cached_plan}
+
+        # Profiles that would hit the same cache entry also share an in-flight run
+        final_response = await plan_flights.run(
+            plan_cache_key(request), lambda: plan_limiter.run(lambda: run_plan_agent(request))
+        )
         return {"plan": final_response}
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.exception("[request %s] /generate-plan failed", request_id_var.get())
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate-plan/stream", dependencies=[Depends(agent_ready)])
+async def generate_plan_stream(request: PlanRequest, http_request: Request):
+    """Same as /generate-plan, streamed as Server-Sent Events while the agent works."""
+    if PLAN_CACHE_ENABLED:
+        cached_plan = await plan_cache.get(request)
+        if cached_plan is not None:
+            return StreamingResponse(
+                iter([format_sse("done", {"plan": cached_plan, "cached": True})]),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS,
+            )
+
+    release = await plan_limiter.acquire()
+    try:
+        session = await session_service.create_session(
+            app_name="fitforge_agent_app", user_id="api_user"
+        )
+        prompt = build_plan_prompt(request, await precompute_plan_context(request))
+        runner = await runner_pool.acquire()
+    except BaseException:
+        # Also on cancellation (client gone), or the slot would be lost for good
+        release()
+        raise
+    user_message = genai_types.Content(
+        role="user", parts=[genai_types.Part(text=prompt)]
+    )
+    return admitted_stream(
+        stream_agent_events(
+            runner, http_request, session.user_id, session.id, user_message,
+            final_key="plan", on_final=lambda plan: cache_plan(request, plan),
+        ),
+        release,
+    )
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a background plan job; includes the plan once it has succeeded."""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/meal-plan", response_model=MealPlan)
+async def meal_plan(request: MealPlanRequest):
+    """One-day meal plan for explicit daily targets, solved from the food catalog without the agent."""
+    try:
+        return solve_meal_plan(await catalog.get(), **request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/plan-cache/stats")
+async def plan_cache_stats():
+    return {"enabled": PLAN_CACHE_ENABLED, **plan_cache.snapshot()}
+
+metrics.callback("fitforge_plan_cache_hits_total", "Plan cache hits (memory and Postgres tiers).", lambda: plan_cache.stats["memory_hits"] + plan_cache.stats["postgres_hits"], kind="counter")
+metrics.callback("fitforge_plan_cache_misses_total", "Plan cache misses.", lambda: plan_cache.stats["misses"], kind="counter")
+metrics.callback("fitforge_plan_cache_entries", "Plans held in this worker's in-memory cache.", lambda: plan_cache.snapshot()["entries"])
+metrics.callback("fitforge_plan_cache_hit_ratio", "Plan cache hit ratio since startup.", lambda: plan_cache.snapshot()["hit_ratio"])
+
+for limiter in (plan_limiter, chat_limiter):
+    metrics.callback(f"fitforge_{limiter.name}_active_runs", f"Admitted {limiter.name} agent runs in progress.", lambda l=limiter: l.active)
+    metrics.callback(f"fitforge_{limiter.name}_queued_requests", f"{limiter.name.title()} requests waiting for a slot.", lambda l=limiter: l.waiting)
+    metrics.callback(f"fitforge_{limiter.name}_rejected_total", f"{limiter.name.title()} requests rejected with 429/503.", lambda l=limiter: l.stats["rejected_queue_full"] + l.stats["rejected_timeout"], kind="counter")
+for name, flights in (("plan", plan_flights), ("chat", chat_flights)):
+    metrics.callback(f"fitforge_{name}_coalesced_total", f"{name.title()} requests served by another request's in-flight run.", lambda f=flights: f.stats["coalesced"], kind="counter")
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (per worker process)."""
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 
 # Chat endpoint
 class ChatRequest(BaseModel):
@@ -101,61 +355,151 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     session_id: str
+    # Token accounting for this turn and the session so far (see context_budget.py)
+    usage: Optional[dict] = None
+    # Set to the intent when the message was answered locally, without the agent (see fast_path.py)
+    fast_path: Optional[str] = None
+
+async def get_or_create_chat_session(session_id: Optional[str]):
+    if session_id:
+        session = await session_service.get_session(
+            app_name="fitforge_agent_app", user_id="api_user", session_id=session_id
+        )
+        if session:
+            return session
+    return await session_service.create_session(
+        app_name="fitforge_agent_app", user_id="api_user"
+    )
+
+def build_chat_message(request: ChatRequest) -> "genai_types.Content":
+    # The persona lives in the agent instruction; each stored turn only carries the mode's focus
+    return genai_types.Content(
+        role="user", parts=[genai_types.Part(text=chat_text(request.message, request.mode))]
+    )
+
+async def try_fast_path(request: ChatRequest):
+    """Answers a calculator-style message without the agent; returns (session, answer) or None."""
+    if not CHAT_FAST_PATH_ENABLED:
+        return None
+    start = time.perf_counter()
+    answer = await match_fast_path(request.message)
+    if answer is None:
+        fast_path_stats.miss()
+        return None
+    session = await get_or_create_chat_session(request.session_id)
+    await record_turn(await runner_pool.acquire(), session, build_chat_message(request), answer.text)
+    fast_path_stats.hit(answer.intent, time.perf_counter() - start)
+    return session, answer
+
+async def run_chat_agent(session, user_message: "genai_types.Content") -> tuple:
+    """Returns the final text and the turn's token usage."""
+    final_response = "[Agent did not produce a final response]"
+    usage = TokenUsage(session.state)
+    start = time.perf_counter()
 
-@app.post("/chat", response_model=ChatResponse)
+    runner = await runner_pool.acquire()
+    events = runner.run_async(
+        user_id=session.user_id, session_id=session.id, new_message=user_message
+    )
+    async with aclosing(trace_agent_events(events, "/chat")) as traced:
+        async for event in traced:
+            usage.observe(event)
+            if event.is_final_response() and event.content and event.content.parts:
+                final_response = event.content.parts[0].text
+                break
+    # Baseline for the fast path's "time saved"
+    fast_path_stats.agent_turn(time.perf_counter() - start)
+    return final_response, usage.to_dict()
+
+@app.post("/chat", response_model=ChatResponse, dependencies=[Depends(agent_ready)])
 async def chat(request: ChatRequest):
     try:
+        fast = await try_fast_path(request)
+        if fast is not None:
+            session, answer = fast
+            return ChatResponse(response=answer.text, session_id=session.id, fast_path=answer.intent)
+
+        session = await get_or_create_chat_session(request.session_id)
+        user_message = build_chat_message(request)
+
+        run = lambda: chat_limiter.run(lambda: run_chat_agent(session, user_message))
         if request.session_id:
-            session = await session_service.get_session(
-                app_name="fitforge_agent_app", user_id="api_user", session_id=request.session_id
-            )
-            if not session:
-                session = await session_service.create_session(
-                    app_name="fitforge_agent_app", user_id="api_user"
-                )
+            # A double-submitted message in an existing session is answered once
+            final_response, usage = await chat_flights.run(message_key(session.id, request.mode or "", request.message), run)
         else:
-            session = await session_service.create_session(
-                app_name="fitforge_agent_app", user_id="api_user"
-            )
+            final_response, usage = await run()
 
-        if request.mode == 'diet':
-            system_prompt = "You are FitForge, an expert diet and nutrition AI coach..."
-        elif request.mode == 'exercise':
-            system_prompt = "You are FitForge, an expert exercise and fitness AI coach..."
-        else:
-            system_prompt = "You are FitForge, an expert fitness and nutrition AI coach..."
+        return ChatResponse(response=final_response, session_id=session.id, usage=usage)
 
-        full_prompt = f"{system_prompt}\n\nUser: {request.message}"
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.exception("[request %s] /chat failed", request_id_var.get())
+        raise HTTPException(status_code=500, detail=str(e))
 
-        user_message = genai_types.Content(
-            role="user", parts=[genai_types.Part(text=full_prompt)]
+@app.post("/chat/stream", dependencies=[Depends(agent_ready)])
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """Same as /chat, streamed as Server-Sent Events (delta, tool_call, tool_result, done)."""
+    fast = await try_fast_path(request)
+    if fast is not None:
+        session, answer = fast
+        return StreamingResponse(
+            iter([format_sse("done", {"response": answer.text, "session_id": session.id, "fast_path": answer.intent})]),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
         )
+    release = await chat_limiter.acquire()
+    try:
+        session = await get_or_create_chat_session(request.session_id)
+        runner = await runner_pool.acquire()
+    except BaseException:
+        # Also on cancellation (client gone), or the slot would be lost for good
+        release()
+        raise
+    return admitted_stream(
+        stream_agent_events(
+            runner, http_request, session.user_id, session.id, build_chat_message(request),
+            usage=TokenUsage(session.state),
+        ),
+        release,
+    )
 
-        final_response = "[Agent did not produce a final response]"
 
-        async for event in runner.run_async(
-            user_id=session.user_id, session_id=session.id, new_message=user_message
-        ):
-            if event.is_final_response() and event.content and event.content.parts:
-                final_response = event.content.parts[0].text
-                break
+@app.get("/chat/fast-path/stats")
+async def chat_fast_path_stats():
+    return fast_path_stats.snapshot()
 
-        return ChatResponse(response=final_response, session_id=session.id)
+metrics.callback("fitforge_chat_fast_path_hits_total", "Chat messages answered locally without the agent.", lambda: sum(fast_path_stats.hits.values()), kind="counter")
+metrics.callback("fitforge_chat_fast_path_misses_total", "Chat messages passed on to the agent.", lambda: fast_path_stats.misses, kind="counter")
+metrics.callback("fitforge_chat_fast_path_saved_seconds_total", "Estimated agent time saved by the chat fast path.", lambda: fast_path_stats.saved_seconds, kind="counter")
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+# Bulk import of workout and weight history
+@app.post("/import")
+async def import_logs(request: Request):
+    """Accepts a JSON list (or {"entries": [...]}) or a streamed NDJSON body (application/x-ndjson)."""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return await ingest_entries(iter_ndjson(request.stream()))
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON or NDJSON.")
+    entries = body.get("entries") if isinstance(body, dict) else body
+    if not isinstance(entries, list):
+        raise HTTPException(status_code=400, detail="Expected a list of entries.")
+    return await ingest_entries(entries)
 
 
 # Serve index page
-@app.get("/")
-async def read_index():
-    return FileResponse('app/frontend/index.html')
+@app.api_route("/", methods=["GET", "HEAD"])
+async def read_index(request: Request):
+    return static_site.page("index").response(request.headers, head=request.method == "HEAD")
 
 # Serve other static HTML pages
-@app.get("/{page_name}.html")
-async def serve_html(page_name: str):
-    file_path = f"app/frontend/{page_name}.html"
-    if os.path.exists(file_path):
-        return FileResponse(file_path)
-    raise HTTPException(status_code=404, detail="Page not found")
+@app.api_route("/{page_name}.html", methods=["GET", "HEAD"])
+async def serve_html(page_name: str, request: Request):
+    page = static_site.page(page_name)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+    return page.response(request.headers, head=request.method == "HEAD")
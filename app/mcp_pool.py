@@ -0,0 +1,91 @@
+# app/mcp_pool.py
+import asyncio
+import itertools
+import os
+from typing import List, Optional, Set
+
+import httpx
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+
+from .agent import MCP_SERVER_URL, build_fitforge_agent
+
+# Each pooled runner owns one agent, one MCPToolset and so one tool-server connection
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "4" if MCP_SERVER_URL else "1"))
+MCP_HEALTH_INTERVAL_SECONDS = float(os.getenv("MCP_HEALTH_INTERVAL_SECONDS", "15"))
+
+
+def health_url(server_url: str) -> str:
+    """http://host:port/mcp -> http://host:port/health"""
+    return str(httpx.URL(server_url).copy_with(path="/health", query=None))
+
+
+class RunnerPool:
+    """Round-robin pool of runners sharing one session store but not one MCP connection.
+
+    A single stdio pipe (or HTTP session) serializes every tool call behind it;
+    spreading runs across several connections to the long-lived tool server
+    removes that bottleneck without spawning a process per request.
+    """
+
+    def __init__(self, app_name: str, session_service: BaseSessionService, size: int = MCP_POOL_SIZE, server_url: Optional[str] = MCP_SERVER_URL):
+        self.server_url = server_url
+        self.runners: List[Runner] = [
+            Runner(agent=build_fitforge_agent(), app_name=app_name, session_service=session_service)
+            for _ in range(max(1, size))
+        ]
+        self._cycle = itertools.cycle(self.runners)
+        self.healthy = True
+        self.last_health_error: Optional[str] = None
+        # Runners whose tool-server connection predates an outage; reset by the next request to use them
+        self._stale: Set[int] = set()
+
+    async def acquire(self) -> Runner:
+        """Next runner in turn, with its connection reset first if it went stale."""
+        runner = next(self._cycle)
+        if id(runner) in self._stale:
+            self._stale.discard(id(runner))
+            await self._close_toolsets(runner)
+        return runner
+
+    def toolsets(self, runners: Optional[List[Runner]] = None) -> List[MCPToolset]:
+        return [t for r in (runners or self.runners) for t in r.agent.tools if isinstance(t, MCPToolset)]
+
+    async def check_health(self) -> bool:
+        """Pings the tool server's /health route. Stdio pools are always considered healthy."""
+        if not self.server_url:
+            return True
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(health_url(self.server_url))
+            response.raise_for_status()
+            self.last_health_error = None
+            return True
+        except Exception as e:
+            self.last_health_error = str(e)
+            return False
+
+    async def monitor_health(self, interval: float = MCP_HEALTH_INTERVAL_SECONDS) -> None:
+        """Background task: when the tool server comes back after an outage, marks every pooled
+        connection stale. The monitor never closes them itself: the request that next picks a
+        stale runner resets it (see acquire), so no connection is torn down from this task."""
+        while True:
+            healthy = await self.check_health()
+            if healthy and not self.healthy:
+                print("MCP tool server is reachable again; resetting pooled connections.")
+                self._stale.update(id(r) for r in self.runners)
+            elif not healthy and self.healthy:
+                print(f"MCP tool server health check failed: {self.last_health_error}")
+            self.healthy = healthy
+            await asyncio.sleep(interval)
+
+    async def _close_toolsets(self, runner: Runner) -> None:
+        # The toolset reconnects on its next call
+        for toolset in self.toolsets([runner]):
+            await toolset.close()
+
+    async def close(self) -> None:
+        self._stale.clear()
+        for toolset in self.toolsets():
+            await toolset.close()
@@ -1,25 +1,80 @@
 # app/mcp_server.py
-from dotenv import load_dotenv
 import os
-
-dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
-load_dotenv(dotenv_path=dotenv_path)
-
+import argparse
+from contextlib import asynccontextmanager
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from app import config  # loads .env before any setting is read
 from app import tools as fitforge_tools
+from app.catalog import catalog
+from app.database import async_engine, ensure_log_indexes
+from app.rollups import ensure_rollup_tables
+from app.telemetry import PROMETHEUS_CONTENT_TYPE, install_query_counter, instrument_tool, metrics
+from app.tool_results import output_format
+
+# Per-tool-call SQL statement counts for fitforge_tool_db_queries
+install_query_counter(async_engine)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    # Build the in-memory exercise/food indexes once, before the first tool call
+    await catalog.load()
+    # The logging tools write rollups in the same transaction; make sure a not-yet-migrated database has the tables
+    await ensure_rollup_tables()
+    # Same for the composite log indexes behind the SQL aggregates (also created by migrate_db.py)
+    await ensure_log_indexes()
+    try:
+        yield
+    finally:
+        await async_engine.dispose()
 
-mcp = FastMCP(name="FitForge Tool Service")
+mcp = FastMCP(name="FitForge Tool Service", lifespan=lifespan)
 
-mcp.tool()(fitforge_tools.calculate_tdee_and_macros)
-mcp.tool()(fitforge_tools.calculate_bmi)
-mcp.tool()(fitforge_tools.estimate_one_rep_max)
-mcp.tool()(fitforge_tools.find_exercises_by_muscle)
-mcp.tool()(fitforge_tools.get_macronutrients_for_food)
-mcp.tool()(fitforge_tools.log_workout)
-mcp.tool()(fitforge_tools.log_daily_weight)
-mcp.tool()(fitforge_tools.get_strength_progress)
-mcp.tool()(fitforge_tools.suggest_exercise_substitutions)
+# Typed results with output schemas by default; TOOL_OUTPUT_FORMAT=prose restores the sentences
+mcp.tool()(instrument_tool(output_format(fitforge_tools.calculate_tdee_and_macros)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.calculate_bmi)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.estimate_one_rep_max)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.find_exercises_by_muscle)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.get_macronutrients_for_food)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.calculate_meal_macros)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.generate_meal_plan)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.log_workout)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.log_daily_weight)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.bulk_log_entries)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.get_strength_progress)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.get_strength_analytics)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.get_weight_trend)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.get_training_volume)))
+mcp.tool()(instrument_tool(output_format(fitforge_tools.suggest_exercise_substitutions)))
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness probe used by the agent's connection pool (HTTP/SSE transports only)."""
+    return JSONResponse({"status": "ok", "catalog_loaded": catalog.loaded})
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """Tool durations and DB query counts in Prometheus format (HTTP/SSE transports only)."""
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@mcp.custom_route("/catalog/refresh", methods=["POST"])
+async def refresh_catalog(request: Request) -> JSONResponse:
+    """Reloads the exercise/food catalog right away, e.g. after import_catalog.py (HTTP/SSE transports only)."""
+    snapshot = await catalog.refresh()
+    return JSONResponse({"status": "ok", "exercises": len(snapshot.exercises), "foods": len(snapshot.foods)})
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FitForge MCP tool server")
+    parser.add_argument("--transport", default=os.getenv("MCP_TRANSPORT", "stdio"), choices=["stdio", "http", "sse"])
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8765")))
+    args = parser.parse_args()
+
     print("🚀 Starting FitForge FastMCP Tool Server...")
-    mcp.run()
\ No newline at end of file
+    if args.transport == "stdio":
+        mcp.run()
+    else:
+        # Long-lived network service: one process, one DB pool, one catalog for every chat
+        mcp.run(transport=args.transport, host=args.host, port=args.port)
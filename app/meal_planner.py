@@ -0,0 +1,262 @@
+# app/meal_planner.py
+import os
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .catalog import CatalogSnapshot, FoodRecord
+from .tool_results import MacroTotals, MealPlan, PlannedFood, PlannedMeal
+
+# --- Meal Plan Solver Settings ---
+# Allowed relative miss on each daily target before a plan is reported as out of tolerance
+MEAL_PLAN_TOLERANCE = float(os.getenv("MEAL_PLAN_TOLERANCE", "0.05"))
+# Foods taken from each ranking of each macro role per meal; the combinations tried grow with its cube
+MEAL_PLAN_CANDIDATES = int(os.getenv("MEAL_PLAN_CANDIDATES", "4"))
+MAX_MEALS = 6
+PORTION_STEP_G = 5.0
+MAX_PORTION_G = 400.0
+# Also caps dense foods (oils, nuts) at a sensible serving
+MAX_PORTION_KCAL = 800.0
+# Foods whose nutrients are all within this fraction of a picked candidate add no choice
+NEAR_DUPLICATE = 0.15
+MAX_CACHED_EXCLUSIONS = 64
+# Deepest position read in a ranking while looking for distinct candidates
+MAX_SCAN = 512
+# Too little energy (leafy greens, drinks) to carry a share of a meal's macros
+MIN_KCAL_PER_100G = 40.0
+# kcal per gram of protein, carbs and fat
+MACRO_KCAL = np.array([4.0, 4.0, 9.0])
+ROLES = ("protein", "carbs", "fat")
+MACRO_FIELDS = ("calories", "protein_g", "carbs_g", "fat_g")
+
+
+class MealPlanRequest(BaseModel):
+    calories: int = Field(gt=0)
+    protein_g: int = Field(ge=0)
+    carbs_g: int = Field(ge=0)
+    fat_g: int = Field(ge=0)
+    meals: int = Field(3, ge=1, le=MAX_MEALS)
+    # Name fragments to leave out, e.g. allergies or dislikes
+    exclude_foods: List[str] = []
+
+
+class MealIndex:
+    """Per-gram nutrient matrix of a catalog snapshot, with foods ranked per macro role.
+
+    A food's role is the macro most of its energy comes from. Each role keeps two
+    rankings: purest first (the best-conditioned mix) and densest first (enough of
+    the macro within a sensible portion), so candidates cover both.
+    """
+
+    def __init__(self, foods: List[FoodRecord]):
+        self.foods = foods
+        self.names = np.array([f.name.lower() for f in foods], dtype=str)
+        self.per_gram = np.array(
+            [[f.calories_per_100g, f.protein_g_per_100g, f.carbs_g_per_100g, f.fat_g_per_100g] for f in foods], dtype=float
+        ).reshape(-1, 4) / 100.0
+        kcal = self.per_gram[:, 0]
+        self.max_grams = np.minimum(MAX_PORTION_G, MAX_PORTION_KCAL / np.maximum(kcal, 1e-9))
+        energy = self.per_gram[:, 1:] * MACRO_KCAL
+        total = energy.sum(axis=1, keepdims=True)
+        shares = np.divide(energy, total, out=np.zeros_like(energy), where=total > 0)
+        role, purity = shares.argmax(axis=1), shares.max(axis=1)
+        # Grams of the role's macro in the largest allowed portion
+        reach = self.per_gram[np.arange(len(foods)), 1 + role] * self.max_grams
+        usable = kcal * 100 >= MIN_KCAL_PER_100G
+        self.ranked: List[Tuple[np.ndarray, ...]] = []
+        for r in range(len(ROLES)):
+            idx = np.flatnonzero(usable & (role == r))
+            # Stable sorts, so ties keep catalog (id) order and every plan is reproducible
+            self.ranked.append((idx[np.argsort(-purity[idx], kind="stable")], idx[np.argsort(-reach[idx], kind="stable")]))
+        self._exclusions: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    def allowed(self, exclude_foods: Sequence[str]) -> Optional[np.ndarray]:
+        fragments = tuple(sorted({f.strip().lower() for f in exclude_foods if f.strip()}))
+        if not fragments:
+            return None
+        mask = self._exclusions.get(fragments)
+        if mask is None:
+            mask = np.ones(len(self.names), dtype=bool)
+            for fragment in fragments:
+                mask &= np.char.find(self.names, fragment) < 0
+            if len(self._exclusions) >= MAX_CACHED_EXCLUSIONS:
+                self._exclusions.clear()
+            self._exclusions[fragments] = mask
+        return mask
+
+    def distinct(self, candidates: np.ndarray, picked: List[int]) -> np.ndarray:
+        """Mask of candidates that are not near-duplicates (every nutrient within 15%) of a picked food."""
+        if not picked:
+            return np.ones(len(candidates), dtype=bool)
+        rows, ref = self.per_gram[candidates][:, None, :], self.per_gram[picked][None, :, :]
+        differs = np.abs(rows - ref) > NEAR_DUPLICATE * np.maximum(rows, ref) + 1e-9
+        return differs.any(axis=2).all(axis=1)
+
+
+def meal_index(snapshot: CatalogSnapshot) -> MealIndex:
+    if snapshot.meal_index is None:
+        snapshot.meal_index = MealIndex(snapshot.foods)
+    return snapshot.meal_index
+
+
+def bounded_lstsq(A: np.ndarray, b: np.ndarray, lo: np.ndarray, hi: np.ndarray, x0: Optional[np.ndarray] = None, ridge: float = 0.0) -> np.ndarray:
+    """Least squares with box bounds: solve, pin violated variables to their bound, repeat.
+
+    With ``x0`` and ``ridge`` the free variables are also pulled towards ``x0``.
+    """
+    n = A.shape[1]
+    x0 = np.zeros(n) if x0 is None else x0
+    pinned = np.full(n, np.nan)
+    for _ in range(n + 1):
+        free = np.isnan(pinned)
+        x = pinned.copy()
+        if free.any():
+            Af = A[:, free]
+            r = b - A[:, ~free] @ pinned[~free]
+            x[free] = np.linalg.solve(Af.T @ Af + ridge * np.eye(Af.shape[1]) + 1e-12 * np.eye(Af.shape[1]), Af.T @ r + ridge * x0[free])
+        low, high = free & (x < lo), free & (x > hi)
+        if not (low.any() or high.any()):
+            return x
+        pinned[low], pinned[high] = lo[low], hi[high]
+    return np.clip(x, lo, hi)
+
+
+def _take_distinct(index: MealIndex, ranked: np.ndarray, picked: List[int], skip: set, count: int, chunk: int = 64) -> None:
+    """Appends up to ``count`` foods from the head of a ranking, skipping near-duplicates.
+
+    Read in chunks and at most MAX_SCAN deep: past a long run of variants of one food
+    (a hundred olive oils) the ranking has nothing better to offer.
+    """
+    taken = 0
+    for start in range(0, min(len(ranked), MAX_SCAN), chunk):
+        block = ranked[start:start + chunk]
+        block = block[~np.isin(block, list(skip | set(picked)))]
+        while len(block) and taken < count:
+            hits = np.flatnonzero(index.distinct(block, picked))
+            if not len(hits):
+                break
+            picked.append(int(block[hits[0]]))
+            taken += 1
+            block = block[hits[0] + 1:]
+        if taken == count:
+            return
+
+
+def _candidates(index: MealIndex, rankings: List[Tuple[np.ndarray, ...]], used: set) -> List[np.ndarray]:
+    """Distinct top foods per role from each ranking, preferring ones no earlier meal used."""
+    result = []
+    for role_rankings in rankings:
+        picked: List[int] = []
+        for skip in (used, set()):
+            for ranked in role_rankings:
+                _take_distinct(index, ranked, picked, skip, MEAL_PLAN_CANDIDATES)
+            if picked:
+                break
+        if picked:
+            result.append(np.array(picked))
+    return result
+
+
+def _solve_meal(index: MealIndex, candidates: List[np.ndarray], target: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Best food combination (one per role) for one meal and its grams.
+
+    Every combination is fitted at once with batched normal equations; only the
+    winner gets the exact bounded solve.
+    """
+    combos = np.array(list(product(*candidates)))  # (c, roles)
+    A = index.per_gram[combos].transpose(0, 2, 1) * weights[None, :, None]  # (c, 4, roles)
+    b = target * weights
+    At = A.transpose(0, 2, 1)
+    grams = np.linalg.solve(At @ A + 1e-9 * np.eye(combos.shape[1]), (At @ b)[..., None])[..., 0]
+    grams = np.clip(grams, PORTION_STEP_G, index.max_grams[combos])
+    errors = np.linalg.norm((A @ grams[..., None])[..., 0] - b, axis=1)
+    foods = combos[int(np.argmin(errors))]
+    grams = bounded_lstsq(index.per_gram[foods].T * weights[:, None], b, np.full(len(foods), PORTION_STEP_G), index.max_grams[foods])
+    return foods, grams
+
+
+def _round_portions(A: np.ndarray, b: np.ndarray, grams: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Nudges rounded portions one step at a time while that still reduces the error.
+
+    Rounding dense foods (oils, nuts) to 5g can cost a low fat target several percent.
+    """
+    residual = A @ grams - b
+    steps = np.array([-PORTION_STEP_G, PORTION_STEP_G])
+    for _ in range(4 * len(grams)):
+        # Squared error after moving each portion one step down or up
+        trial = residual[None, None, :] + steps[:, None, None] * A.T[None, :, :]
+        errors = (trial ** 2).sum(axis=2)
+        errors[0, grams - PORTION_STEP_G < PORTION_STEP_G] = np.inf
+        errors[1, grams + PORTION_STEP_G > hi] = np.inf
+        direction, item = np.unravel_index(int(np.argmin(errors)), errors.shape)
+        if errors[direction, item] >= (residual ** 2).sum():
+            break
+        grams[item] += steps[direction]
+        residual = trial[direction, item]
+    return grams
+
+
+def solve_meal_plan(snapshot: CatalogSnapshot, calories: int, protein_g: int, carbs_g: int, fat_g: int, meals: int = 3,
+                    exclude_foods: Sequence[str] = (), tolerance: float = MEAL_PLAN_TOLERANCE) -> MealPlan:
+    """Picks foods and gram amounts from the catalog so the day hits the macro targets.
+
+    Each meal gets an equal share of the targets and one food per macro role, chosen
+    by a vectorized least-squares fit over the top candidates. A joint bounded
+    least-squares pass then corrects the daily totals (dropping token portions)
+    before the portions are rounded to 5g steps.
+    """
+    index = meal_index(snapshot)
+    meals = max(1, min(int(meals), MAX_MEALS))
+    daily = np.array([calories, protein_g, carbs_g, fat_g], dtype=float)
+    # Relative error per macro; a zero target still counts grams of that macro against the plan
+    weights = 1.0 / np.maximum(daily, 10.0)
+    allowed = index.allowed(exclude_foods)
+    rankings = index.ranked if allowed is None else [tuple(ranked[allowed[ranked]] for ranked in role) for role in index.ranked]
+
+    chosen: List[np.ndarray] = []
+    split: List[np.ndarray] = []
+    used: set = set()
+    for _ in range(meals):
+        candidates = _candidates(index, rankings, used)
+        if not candidates:
+            raise ValueError("No foods in the catalog can be used for a meal plan.")
+        foods, grams = _solve_meal(index, candidates, daily / meals, weights)
+        chosen.append(foods)
+        split.append(grams)
+        used.update(foods.tolist())
+
+    # Joint correction of the daily totals, kept close to the per-meal split
+    flat, x0 = np.concatenate(chosen), np.concatenate(split)
+    meal_of = np.repeat(np.arange(meals), [len(foods) for foods in chosen])
+    for attempt in range(2):
+        A = index.per_gram[flat].T * weights[:, None]
+        lo, hi = np.full(len(flat), PORTION_STEP_G), index.max_grams[flat]
+        grams = bounded_lstsq(A, daily * weights, lo, hi, x0=x0, ridge=1e-3 * np.trace(A.T @ A) / len(flat))
+        # Foods pinned at the minimum add nothing but a token spoonful: drop them and solve once more
+        keep = (grams > PORTION_STEP_G + 1e-6) | (np.bincount(meal_of, grams > PORTION_STEP_G + 1e-6, meals)[meal_of] == 0)
+        if keep.all() or attempt:
+            break
+        flat, x0, meal_of = flat[keep], grams[keep], meal_of[keep]
+    grams = _round_portions(A, daily * weights, np.maximum(np.round(grams / PORTION_STEP_G) * PORTION_STEP_G, PORTION_STEP_G), hi)
+
+    amounts = index.per_gram[flat] * grams[:, None]
+    planned = []
+    for number in range(meals):
+        rows = np.flatnonzero(meal_of == number)
+        items = [PlannedFood(food=index.foods[flat[r]].name, grams=float(grams[r]), **_totals(amounts[r])) for r in rows]
+        planned.append(PlannedMeal(meal=number + 1, items=items, totals=MacroTotals(**_totals(amounts[rows].sum(axis=0)))))
+
+    totals = amounts.sum(axis=0)
+    deviation = np.divide(totals - daily, daily, out=np.zeros(4), where=daily > 0)
+    return MealPlan(
+        meals=planned,
+        totals=MacroTotals(**_totals(totals)),
+        deviation_pct={field: round(float(d) * 100, 1) for field, d in zip(MACRO_FIELDS, deviation)},
+        within_tolerance=bool(np.all(np.abs(deviation) <= tolerance)),
+    )
+
+
+def _totals(row: np.ndarray) -> dict:
+    return {"calories": round(float(row[0])), "protein_g": round(float(row[1]), 1), "carbs_g": round(float(row[2]), 1), "fat_g": round(float(row[3]), 1)}
@@ -1,5 +1,5 @@
  
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum, ForeignKey, Table, Index, Text
 from sqlalchemy.orm import relationship, DeclarativeBase
 from datetime import datetime
 import enum
@@ -38,14 +38,33 @@ class UserProfile(Base):
     goal = Column(Enum(Goal))
     user = relationship("User", back_populates="profile")
 
+# Association between exercises and the (normalized) equipment they require.
+# The composite primary key answers "equipment for exercise"; the reverse
+# index answers "exercises needing this equipment".
+exercise_equipment = Table(
+    'exercise_equipment',
+    Base.metadata,
+    Column('exercise_id', Integer, ForeignKey('exercises.id', ondelete='CASCADE'), primary_key=True),
+    Column('equipment_id', Integer, ForeignKey('equipment.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_exercise_equipment_equipment_id', 'equipment_id', 'exercise_id'),
+)
+
+class Equipment(Base):
+    __tablename__ = 'equipment'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, index=True)  # canonical form, e.g. "dumbbell"
+    display_name = Column(String)
+    exercises = relationship("Exercise", secondary=exercise_equipment, back_populates="equipment_items")
+
 class Exercise(Base):
     __tablename__ = 'exercises'
     id = Column(Integer, primary_key=True)
     name = Column(String, unique=True)
-    target_muscle = Column(String)
-    equipment = Column(String)
+    target_muscle = Column(String, index=True)
+    equipment = Column(String)  # legacy display string, e.g. "Dumbbells, Bench"
     instructions = Column(String)
     video_url = Column(String, nullable=True)
+    equipment_items = relationship("Equipment", secondary=exercise_equipment, back_populates="exercises")
 
 class Food(Base):
     __tablename__ = 'foods'
@@ -66,11 +85,66 @@ class WorkoutLog(Base):
     weight_kg = Column(Float)
     date = Column(DateTime, default=datetime.utcnow)
 
-    
+    # Per-user, per-exercise history in date order (progress queries, first/latest lookups)
+    __table_args__ = (Index('ix_workout_logs_user_exercise_date', 'user_id', 'exercise_id', 'date'),)
 
 class WeightLog(Base):
     __tablename__ = 'weight_logs'
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
     weight_kg = Column(Float)
-    date = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    date = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index('ix_weight_logs_user_date', 'user_id', 'date'),)
+
+class PlanCacheEntry(Base):
+    __tablename__ = 'plan_cache'
+    key = Column(String(64), primary_key=True)  # sha256 of the canonicalized PlanRequest
+    plan = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+class ImportCheckpoint(Base):
+    __tablename__ = 'import_checkpoints'
+    source = Column(String, primary_key=True)  # "<kind>:<absolute path>"
+    fingerprint = Column(String(64))  # sha256 of the file, a changed file restarts from row 0
+    rows_done = Column(Integer, default=0)
+    completed = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class PlanJob(Base):
+    __tablename__ = 'plan_jobs'
+    id = Column(String(32), primary_key=True)
+    status = Column(String(16), index=True)  # queued | running | succeeded | failed
+    request = Column(Text)  # PlanRequest as JSON
+    plan = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    worker = Column(String, nullable=True)  # process that claimed the job
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+# Rollups of the raw logs, kept up to date by the logging tools and imports (app/rollups.py)
+class WeightRollup(Base):
+    __tablename__ = 'weight_rollups'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    entries = Column(Integer, default=0)
+    weight_sum_kg = Column(Float, default=0.0)
+    min_kg = Column(Float)
+    max_kg = Column(Float)
+    ema_kg = Column(Float)  # exponential moving average of the daily means, through this day
+
+class TrainingRollup(Base):
+    __tablename__ = 'training_rollups'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    period = Column(String(4), primary_key=True)  # day | week (weeks start on Monday)
+    period_start = Column(Date, primary_key=True)
+    muscle = Column(String, primary_key=True)  # the exercise's target_muscle
+    entries = Column(Integer, default=0)  # logged workout rows
+    sets = Column(Integer, default=0)
+    reps = Column(Integer, default=0)  # sets x reps
+    tonnage_kg = Column(Float, default=0.0)  # sets x reps x weight
+    best_e1rm_kg = Column(Float, nullable=True)  # only sets of 1-12 reps are estimated
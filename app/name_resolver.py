@@ -0,0 +1,179 @@
+# app/name_resolver.py
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Union
+
+import numpy as np
+from sqlalchemy import text
+
+from .catalog import CatalogSnapshot, ExerciseRecord, FoodRecord, catalog
+from .database import AsyncSessionLocal, async_engine
+
+# "auto": pg_trgm on Postgres when the extension is installed, else the in-memory index
+NAME_RESOLVER_BACKEND = os.getenv("NAME_RESOLVER_BACKEND", "auto")
+# Candidates scoring below this are never returned
+NAME_MATCH_MIN_SCORE = float(os.getenv("NAME_MATCH_MIN_SCORE", "0.3"))
+# Writes (logging, imports) only use a match at least this good
+NAME_MATCH_ACCEPT_SCORE = float(os.getenv("NAME_MATCH_ACCEPT_SCORE", "0.5"))
+# Best match plus this many alternatives
+NAME_MATCH_LIMIT = 4
+
+# stderr: under the stdio transport the tool server's stdout is the MCP channel
+logger = logging.getLogger(__name__)
+
+# Trigram GIN indexes backing the Postgres resolver (created by seed_db.py / migrate_db.py)
+TRIGRAM_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_foods_name_trgm ON foods USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_exercises_name_trgm ON exercises USING gin (lower(name) gin_trgm_ops)",
+]
+
+Record = Union[ExerciseRecord, FoodRecord]
+
+
+def name_trigrams(name: str) -> Set[str]:
+    """Trigrams the way pg_trgm builds them: per word, padded with two spaces in front and one behind."""
+    grams = set()
+    for word in re.findall(r"[a-z0-9]+", name.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    record: Record
+    score: float
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """Ranked matches for one query, best first."""
+    query: str
+    matches: List[NameMatch] = field(default_factory=list)
+
+    @property
+    def best(self) -> Optional[NameMatch]:
+        return self.matches[0] if self.matches else None
+
+    @property
+    def alternatives(self) -> List[NameMatch]:
+        return self.matches[1:]
+
+    @property
+    def confident(self) -> bool:
+        return self.best is not None and self.best.score >= NAME_MATCH_ACCEPT_SCORE
+
+    def suggestions(self) -> str:
+        return ", ".join(f"{m.record.name} ({m.score:.2f})" for m in self.matches)
+
+
+class NgramIndex:
+    """In-memory trigram index scoring every candidate with one NumPy pass.
+
+    Score = mean of trigram similarity (shared / union, as pg_trgm ``similarity``)
+    and containment (share of the query's trigrams found in the name, close to
+    ``word_similarity``), so "chicken" still ranks "Chicken Breast (Cooked)" highly.
+    """
+
+    def __init__(self, records: List[Record]):
+        self.records = records
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for i, record in enumerate(records):
+            grams = name_trigrams(record.name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.asarray(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self.sizes = np.asarray(sizes, dtype=float)
+
+    def search(self, query: str, limit: int = NAME_MATCH_LIMIT, min_score: float = NAME_MATCH_MIN_SCORE) -> List[NameMatch]:
+        grams = name_trigrams(query)
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.records)).astype(float)
+        candidates = np.flatnonzero(shared)
+        common = shared[candidates]
+        scores = (common / (len(grams) + self.sizes[candidates] - common) + common / len(grams)) / 2
+        keep = scores >= min_score
+        candidates, scores = candidates[keep], scores[keep]
+        # Highest score first; ties go to the lowest id (records are sorted by id)
+        order = np.lexsort((candidates, -scores))[:limit]
+        return [NameMatch(self.records[candidates[i]], round(float(scores[i]), 3)) for i in order]
+
+
+def _memory_index(snapshot: CatalogSnapshot, kind: str) -> NgramIndex:
+    # Built lazily once per catalog snapshot, so a catalog reload also rebuilds the index
+    index = snapshot.name_indexes.get(kind)
+    if index is None:
+        index = snapshot.name_indexes[kind] = NgramIndex(snapshot.exercises if kind == "exercises" else snapshot.foods)
+    return index
+
+
+_pg_trgm_available: Optional[bool] = None
+
+
+async def _use_postgres() -> bool:
+    global _pg_trgm_available
+    if NAME_RESOLVER_BACKEND == "memory" or async_engine.dialect.name != "postgresql":
+        return False
+    if _pg_trgm_available is None:
+        async with AsyncSessionLocal() as db:
+            _pg_trgm_available = (await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))).first() is not None
+        if not _pg_trgm_available:
+            logger.warning("pg_trgm is not installed; using the in-memory name index.")
+    return _pg_trgm_available
+
+
+async def _postgres_search(kind: str, query: str, limit: int, by_id: Dict[int, Record]) -> List[NameMatch]:
+    """Ranks names with the trigram GIN index (``%`` / ``<%`` are index-assisted)."""
+    statement = text(
+        f"SELECT id, (similarity(lower(name), :q) + word_similarity(:q, lower(name))) / 2 AS score FROM {kind} "
+        "WHERE lower(name) % :q OR :q <% lower(name) ORDER BY score DESC, id LIMIT :limit"
+    )
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(statement, {"q": query.lower(), "limit": limit})).all()
+    # Rows added after the catalog snapshot was taken are skipped until the next reload
+    return [NameMatch(by_id[row.id], round(float(row.score), 3)) for row in rows if row.id in by_id and row.score >= NAME_MATCH_MIN_SCORE]
+
+
+async def _resolve(kind: str, query: str, limit: int, exact: Callable[[CatalogSnapshot, str], Optional[Record]]) -> Resolution:
+    snapshot = await catalog.get()
+    record = exact(snapshot, query)
+    if record is not None:
+        return Resolution(query, [NameMatch(record, 1.0)])
+    if await _use_postgres():
+        try:
+            by_id = snapshot.exercise_by_id if kind == "exercises" else snapshot.food_by_id
+            return Resolution(query, await _postgres_search(kind, query, limit, by_id))
+        except Exception as e:
+            logger.warning("pg_trgm name lookup failed, falling back to the in-memory index: %s", e)
+    return Resolution(query, _memory_index(snapshot, kind).search(query, limit))
+
+
+async def resolve_exercise(name: str, limit: int = NAME_MATCH_LIMIT) -> Resolution:
+    """Exact (case-insensitive) exercise name, else ranked fuzzy matches."""
+    return await _resolve("exercises", name, limit, lambda s, q: s.find_exercise(q))
+
+
+async def resolve_food(name: str, limit: int = NAME_MATCH_LIMIT) -> Resolution:
+    """Exact (case-insensitive) food name, else ranked fuzzy matches."""
+    return await _resolve("foods", name, limit, lambda s, q: s.food_by_name.get(q.strip().lower()))
+
+
+def create_trigram_indexes(connection) -> bool:
+    """Installs pg_trgm and the name GIN indexes. Returns False if the database can't have them."""
+    if connection.dialect.name != "postgresql":
+        return False
+    try:
+        with connection.begin_nested():
+            for statement in TRIGRAM_INDEXES:
+                connection.execute(text(statement))
+        return True
+    except Exception as e:
+        print(f"Could not create trigram indexes (the in-memory name index will be used): {e}")
+        return False
@@ -0,0 +1,126 @@
+# app/plan_cache.py
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .database import AsyncSessionLocal, async_engine
+from .equipment import equipment_tokens
+from .models import PlanCacheEntry
+from .planning import PlanRequest
+
+# --- Plan Cache Settings ---
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+PLAN_CACHE_POSTGRES = os.getenv("PLAN_CACHE_POSTGRES", "false").lower() == "true"
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1024"))
+PLAN_CACHE_TTL_SECONDS = float(os.getenv("PLAN_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Profiles whose numbers fall in the same bucket share a cached plan
+PLAN_CACHE_AGE_BUCKET = float(os.getenv("PLAN_CACHE_AGE_BUCKET", "5"))
+PLAN_CACHE_WEIGHT_BUCKET = float(os.getenv("PLAN_CACHE_WEIGHT_BUCKET", "2.5"))
+PLAN_CACHE_HEIGHT_BUCKET = float(os.getenv("PLAN_CACHE_HEIGHT_BUCKET", "5"))
+
+
+def _bucket(value: float, width: float) -> float:
+    return value if width <= 0 else (value // width) * width
+
+
+def plan_cache_key(request: PlanRequest) -> str:
+    """Hash of the canonicalized request: sorted equipment, bucketed numbers, normalized text."""
+    canonical = {
+        "goal": request.goal.value,
+        "activity_level": request.activity_level.value,
+        "gender": request.gender.strip().lower(),
+        "equipment": sorted(equipment_tokens(request.available_equipment)),
+        "days_per_week": request.days_per_week,
+        "age": _bucket(request.age, PLAN_CACHE_AGE_BUCKET),
+        "weight_kg": _bucket(request.weight_kg, PLAN_CACHE_WEIGHT_BUCKET),
+        "height_cm": _bucket(request.height_cm, PLAN_CACHE_HEIGHT_BUCKET),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+class PlanCache:
+    """In-process LRU+TTL cache of generated plans, with an optional shared Postgres tier."""
+
+    def __init__(self, max_entries: int = PLAN_CACHE_MAX_ENTRIES, ttl_seconds: float = PLAN_CACHE_TTL_SECONDS, use_postgres: bool = PLAN_CACHE_POSTGRES):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_postgres = use_postgres
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._table_ready = False
+        self.stats = {"memory_hits": 0, "postgres_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    async def get(self, request: PlanRequest) -> Optional[str]:
+        key = plan_cache_key(request)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, plan = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return plan
+            del self._entries[key]
+        if self.use_postgres:
+            plan = await self._get_postgres(key)
+            if plan is not None:
+                self._remember(key, plan)
+                self.stats["postgres_hits"] += 1
+                return plan
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, request: PlanRequest, plan: str) -> None:
+        key = plan_cache_key(request)
+        self._remember(key, plan)
+        self.stats["stores"] += 1
+        if self.use_postgres:
+            await self._put_postgres(key, plan)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """Counters plus derived hit ratio, for the stats endpoint."""
+        hits = self.stats["memory_hits"] + self.stats["postgres_hits"]
+        lookups = hits + self.stats["misses"]
+        return {**self.stats, "entries": len(self._entries), "hit_ratio": round(hits / lookups, 4) if lookups else 0.0}
+
+    def _remember(self, key: str, plan: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, plan)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def _ensure_table(self) -> None:
+        if not self._table_ready:
+            async with async_engine.begin() as conn:
+                await conn.run_sync(lambda sync_conn: PlanCacheEntry.__table__.create(sync_conn, checkfirst=True))
+            self._table_ready = True
+
+    async def _get_postgres(self, key: str) -> Optional[str]:
+        try:
+            await self._ensure_table()
+            async with AsyncSessionLocal() as db:
+                entry = await db.get(PlanCacheEntry, key)
+                if entry is None or entry.expires_at < datetime.utcnow():
+                    return None
+                return entry.plan
+        except Exception as e:
+            print(f"Plan cache lookup failed: {e}")
+            return None
+
+    async def _put_postgres(self, key: str, plan: str) -> None:
+        try:
+            await self._ensure_table()
+            async with AsyncSessionLocal() as db:
+                await db.merge(PlanCacheEntry(key=key, plan=plan, created_at=datetime.utcnow(), expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds)))
+                await db.commit()
+        except Exception as e:
+            print(f"Plan cache store failed: {e}")
+
+
+plan_cache = PlanCache()
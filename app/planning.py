@@ -0,0 +1,113 @@
+# app/planning.py
+import json
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .catalog import catalog
+from .meal_planner import solve_meal_plan
+from .models import ActivityLevel, Goal
+from . import tools as fitforge_tools
+
+# Candidate exercises offered to the agent per muscle group
+EXERCISES_PER_MUSCLE = 6
+
+
+# Request model for plan generation
+class PlanRequest(BaseModel):
+    age: int
+    weight_kg: float
+    height_cm: float
+    gender: str
+    activity_level: ActivityLevel
+    goal: Goal
+    available_equipment: List[str]
+    days_per_week: int
+
+
+class PlanContext(BaseModel):
+    """Everything about a plan that is a pure function of the PlanRequest."""
+    macros: dict
+    bmi: str
+    exercise_pool: Dict[str, List[str]]
+    # Solved from the food catalog to the daily targets (prose form, compact for the prompt)
+    meal_plan: Optional[str] = None
+
+
+async def precompute_plan_context(request: PlanRequest) -> PlanContext:
+    """Runs the deterministic tools locally so the agent does not have to call them."""
+    macros = fitforge_tools.calculate_tdee_and_macros(
+        request.weight_kg, request.height_cm, request.age, request.gender,
+        request.activity_level.value, request.goal.value,
+    ).model_dump()
+    bmi = fitforge_tools.calculate_bmi(request.weight_kg, request.height_cm).model_dump_json()
+    exercise_pool: Dict[str, List[str]] = {}
+    meal_plan: Optional[str] = None
+    snapshot = None
+    try:
+        snapshot = await catalog.get()
+        for muscle in sorted(snapshot.exercises_by_muscle):
+            names = [e.name for e in snapshot.exercises_doable_with(muscle, request.available_equipment)][:EXERCISES_PER_MUSCLE]
+            if names:
+                exercise_pool[snapshot.exercises_by_muscle[muscle][0].target_muscle] = names
+    except Exception as e:
+        # Without the catalog the agent can still look exercises up through its tools
+        print(f"Could not precompute the exercise pool: {e}")
+    if snapshot is not None:
+        try:
+            plan = solve_meal_plan(snapshot, macros["calories"], macros["protein_g"], macros["carbs_g"], macros["fat_g"])
+            meal_plan = plan.to_prose() if plan.within_tolerance else None
+        except ValueError as e:
+            # The agent can still write the meal plan itself
+            print(f"Could not precompute the meal plan: {e}")
+    return PlanContext(macros=macros, bmi=bmi, exercise_pool=exercise_pool, meal_plan=meal_plan)
+
+
+def build_plan_prompt(request: PlanRequest, context: Optional[PlanContext] = None) -> str:
+    profile = f"""
+    Please act as an expert fitness and nutrition coach.
+    A new client has provided the following profile and needs a comprehensive fitness and meal plan.
+
+    **Client Profile:**
+    - **Goal:** {request.goal.value}
+    - **Experience / Activity Level:** {request.activity_level.value}
+    - **Workouts Per Week:** {request.days_per_week}
+    - **Available Equipment:** {', '.join(request.available_equipment) if request.available_equipment else 'Bodyweight only'}
+    - **Age:** {request.age}
+    - **Gender:** {request.gender}
+    - **Weight:** {request.weight_kg} kg
+    - **Height:** {request.height_cm} cm
+    """
+    if context is None:
+        return profile + f"""
+    Your Task:
+    1. First, calculate the user's daily energy and macronutrient needs.
+    2. Based on those needs, create a detailed, sample one-day meal plan.
+    3. Create a detailed, {request.days_per_week}-day workout plan tailored to their goal and equipment.
+    4. Combine everything into a single, encouraging, and easy-to-read report.
+    """
+
+    pool = json.dumps(context.exercise_pool, separators=(",", ":")) if context.exercise_pool else None
+    exercise_step = (
+        f"3. Create a detailed, {request.days_per_week}-day workout plan tailored to their goal, choosing exercises only from the candidate pool."
+        if pool else
+        f"3. Create a detailed, {request.days_per_week}-day workout plan tailored to their goal and equipment."
+    )
+    meal_step = (
+        "2. Present the precomputed meal plan as the sample one-day meal plan, adding simple preparation ideas but keeping its foods and amounts."
+        if context.meal_plan else
+        "2. Based on those targets, create a detailed, sample one-day meal plan."
+    )
+    return profile + f"""
+    **Precomputed Data (already calculated, do not call tools to recompute it):**
+    - **Daily Targets:** {json.dumps(context.macros, separators=(",", ":"))}
+    - **BMI:** {context.bmi}
+    """ + (f"""- **Meal Plan (solved from the food database to match the daily targets):** {context.meal_plan}
+    """ if context.meal_plan else "") + (f"""- **Candidate Exercises By Muscle (all doable with the client's equipment):** {pool}
+    """ if pool else "") + f"""
+    Your Task:
+    1. Use the precomputed daily targets above as the client's energy and macronutrient needs.
+    {meal_step}
+    {exercise_step}
+    4. Combine everything into a single, encouraging, and easy-to-read report.
+    """
@@ -0,0 +1,206 @@
+# app/rollups.py
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .calculations import MAX_E1RM_REPS, brzycki_one_rep_max
+from .catalog import catalog
+from .database import async_engine
+from .models import TrainingRollup, WeightLog, WeightRollup, WorkoutLog
+
+# Share of each day's mean weight that moves the moving average (0.1 = the classic 10% trend line)
+WEIGHT_EMA_ALPHA = float(os.getenv("WEIGHT_EMA_ALPHA", "0.1"))
+ROLLUP_PERIODS = ("day", "week")
+UNKNOWN_MUSCLE = "Unknown"
+REBUILD_BATCH_SIZE = 5000
+
+
+def week_start(day: date) -> date:
+    """Monday of the day's week, the same bucket as get_strength_analytics."""
+    return day - timedelta(days=day.weekday())
+
+
+def period_start(period: str, day: date) -> date:
+    return week_start(day) if period == "week" else day
+
+
+def _greatest(dialect: str, column, excluded):
+    # Either side may be NULL (no estimate yet); GREATEST on Postgres, scalar max() on SQLite
+    fn = func.greatest if dialect == "postgresql" else func.max
+    return fn(func.coalesce(column, excluded), func.coalesce(excluded, column))
+
+
+def _least(dialect: str, column, excluded):
+    fn = func.least if dialect == "postgresql" else func.min
+    return fn(func.coalesce(column, excluded), func.coalesce(excluded, column))
+
+
+def training_rollup_rows(workouts: Iterable[dict], muscle_of: Dict[int, str]) -> List[dict]:
+    """Sums workout log rows into one row per (user, period, period start, muscle)."""
+    rows: Dict[Tuple, dict] = {}
+    for w in workouts:
+        day = w["date"].date()
+        muscle = muscle_of.get(w["exercise_id"]) or UNKNOWN_MUSCLE
+        e1rm = brzycki_one_rep_max(w["weight_kg"], w["reps"]) if 1 <= w["reps"] <= MAX_E1RM_REPS else None
+        for period in ROLLUP_PERIODS:
+            key = (w["user_id"], period, period_start(period, day), muscle)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = {"user_id": key[0], "period": period, "period_start": key[2], "muscle": muscle,
+                                   "entries": 0, "sets": 0, "reps": 0, "tonnage_kg": 0.0, "best_e1rm_kg": None}
+            row["entries"] += 1
+            row["sets"] += w["sets"]
+            row["reps"] += w["sets"] * w["reps"]
+            row["tonnage_kg"] += w["sets"] * w["reps"] * w["weight_kg"]
+            if e1rm is not None and (row["best_e1rm_kg"] is None or e1rm > row["best_e1rm_kg"]):
+                row["best_e1rm_kg"] = e1rm
+    return list(rows.values())
+
+
+def weight_rollup_rows(weights: Iterable[dict]) -> List[dict]:
+    """Sums weight log rows into one row per (user, day); the EMA is filled in afterwards."""
+    rows: Dict[Tuple, dict] = {}
+    for w in weights:
+        key = (w["user_id"], w["date"].date())
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {"user_id": key[0], "day": key[1], "entries": 0, "weight_sum_kg": 0.0, "min_kg": w["weight_kg"], "max_kg": w["weight_kg"]}
+        row["entries"] += 1
+        row["weight_sum_kg"] += w["weight_kg"]
+        row["min_kg"] = min(row["min_kg"], w["weight_kg"])
+        row["max_kg"] = max(row["max_kg"], w["weight_kg"])
+    return list(rows.values())
+
+
+def training_upsert(dialect: str):
+    """INSERT ... ON CONFLICT that adds a batch's totals onto the existing rollup rows."""
+    statement = (postgresql if dialect == "postgresql" else sqlite).insert(TrainingRollup)
+    table, excluded = TrainingRollup.__table__.c, statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "period", "period_start", "muscle"],
+        set_={
+            "entries": table.entries + excluded.entries,
+            "sets": table.sets + excluded.sets,
+            "reps": table.reps + excluded.reps,
+            "tonnage_kg": table.tonnage_kg + excluded.tonnage_kg,
+            "best_e1rm_kg": _greatest(dialect, table.best_e1rm_kg, excluded.best_e1rm_kg),
+        },
+    )
+
+
+def weight_upsert(dialect: str):
+    statement = (postgresql if dialect == "postgresql" else sqlite).insert(WeightRollup)
+    table, excluded = WeightRollup.__table__.c, statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "day"],
+        set_={
+            "entries": table.entries + excluded.entries,
+            "weight_sum_kg": table.weight_sum_kg + excluded.weight_sum_kg,
+            "min_kg": _least(dialect, table.min_kg, excluded.min_kg),
+            "max_kg": _greatest(dialect, table.max_kg, excluded.max_kg),
+        },
+    )
+
+
+def next_ema(ema: Optional[float], last_day: Optional[date], mean: float, day: date) -> float:
+    """One EMA step; a gap of several days counts as that many steps towards the new mean."""
+    if ema is None or last_day is None:
+        return mean
+    decay = (1.0 - WEIGHT_EMA_ALPHA) ** max(1, (day - last_day).days)
+    return ema + (1.0 - decay) * (mean - ema)
+
+
+async def _refresh_weight_ema(db, user_id: int, since: date) -> None:
+    """Recomputes the EMA from ``since`` on: one row for today's log, more only for back-dated imports."""
+    previous = (await db.execute(
+        select(WeightRollup.day, WeightRollup.ema_kg).where(WeightRollup.user_id == user_id, WeightRollup.day < since)
+        .order_by(WeightRollup.day.desc()).limit(1)
+    )).first()
+    last_day, ema = (previous.day, previous.ema_kg) if previous else (None, None)
+    rows = (await db.execute(
+        select(WeightRollup).where(WeightRollup.user_id == user_id, WeightRollup.day >= since).order_by(WeightRollup.day)
+    )).scalars().all()
+    for row in rows:
+        ema = next_ema(ema, last_day, row.weight_sum_kg / row.entries, row.day)
+        row.ema_kg, last_day = ema, row.day
+
+
+async def record_workouts(db, workouts: List[dict]) -> None:
+    """Adds new workout log rows (dicts with user_id, exercise_id, sets, reps, weight_kg, date) to the rollups.
+
+    Runs in the caller's transaction, so the logs and their rollups commit together.
+    """
+    if not workouts:
+        return
+    snapshot = await catalog.get()
+    muscle_of = {e.id: e.target_muscle for e in (snapshot.exercise_by_id.get(w["exercise_id"]) for w in workouts) if e is not None}
+    await db.execute(training_upsert(async_engine.dialect.name), training_rollup_rows(workouts, muscle_of))
+
+
+async def record_weights(db, weights: List[dict]) -> None:
+    """Adds new weight log rows (dicts with user_id, weight_kg, date) to the daily rollups and their EMA."""
+    if not weights:
+        return
+    rows = weight_rollup_rows(weights)
+    await db.execute(weight_upsert(async_engine.dialect.name), rows)
+    since: Dict[int, date] = {}
+    for row in rows:
+        since[row["user_id"]] = min(row["day"], since.get(row["user_id"], row["day"]))
+    await db.flush()
+    for user_id, day in since.items():
+        await _refresh_weight_ema(db, user_id, day)
+
+
+async def ensure_rollup_tables() -> None:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: [t.__table__.create(sync_conn, checkfirst=True) for t in (WeightRollup, TrainingRollup)])
+
+
+def rebuild_rollups(session) -> Tuple[int, int]:
+    """Recomputes every rollup from the raw logs (sync Session; used by migrate_db.py). Does not commit.
+
+    Returns the number of weight and workout log rows read.
+    """
+    from .models import Exercise
+
+    dialect = session.get_bind().dialect.name
+    session.execute(delete(WeightRollup))
+    session.execute(delete(TrainingRollup))
+    muscle_of = dict(session.execute(select(Exercise.id, Exercise.target_muscle)).all())
+
+    workouts = weights = 0
+    batch: List[dict] = []
+    columns = (WorkoutLog.user_id, WorkoutLog.exercise_id, WorkoutLog.sets, WorkoutLog.reps, WorkoutLog.weight_kg, WorkoutLog.date)
+    for log in session.execute(select(*columns).execution_options(yield_per=REBUILD_BATCH_SIZE)):
+        if None in (log.sets, log.reps, log.weight_kg, log.date):
+            continue
+        batch.append(log._asdict())
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            session.execute(training_upsert(dialect), training_rollup_rows(batch, muscle_of))
+            workouts, batch = workouts + len(batch), []
+    if batch:
+        session.execute(training_upsert(dialect), training_rollup_rows(batch, muscle_of))
+        workouts += len(batch)
+
+    columns = (WeightLog.user_id, WeightLog.weight_kg, WeightLog.date)
+    batch = []
+    for log in session.execute(select(*columns).where(WeightLog.weight_kg.is_not(None), WeightLog.date.is_not(None)).execution_options(yield_per=REBUILD_BATCH_SIZE)):
+        batch.append(log._asdict())
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            session.execute(weight_upsert(dialect), weight_rollup_rows(batch))
+            weights, batch = weights + len(batch), []
+    if batch:
+        session.execute(weight_upsert(dialect), weight_rollup_rows(batch))
+        weights += len(batch)
+
+    # One ordered pass fills in every user's EMA
+    user_id, last_day, ema = None, None, None
+    for row in session.execute(select(WeightRollup).order_by(WeightRollup.user_id, WeightRollup.day)).scalars():
+        if row.user_id != user_id:
+            user_id, last_day, ema = row.user_id, None, None
+        ema = next_ema(ema, last_day, row.weight_sum_kg / row.entries, row.day)
+        row.ema_kg, last_day = ema, row.day
+    return weights, workouts
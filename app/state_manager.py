@@ -0,0 +1,162 @@
+# app/state_manager.py
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+from sqlalchemy import column, delete, select, table
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, DatabaseSessionService, InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+from .database import DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT, to_async_url
+
+# --- Session Store Settings ---
+# memory:   process-local (single worker only, lost on restart)
+# postgres: shared by every worker, uses DATABASE_URL
+# sqlite:   local file, for tests and single-host development
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "postgres")
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "fitforge_sessions.db")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600)))
+SESSION_MAX_EVENTS = int(os.getenv("SESSION_MAX_EVENTS", "40"))
+SESSION_EVICT_INTERVAL_SECONDS = float(os.getenv("SESSION_EVICT_INTERVAL_SECONDS", "600"))
+
+# ADK's events table, addressed by name: its ORM classes are internal and move between releases
+EVENTS = table("events", column("id"), column("app_name"), column("user_id"), column("session_id"), column("timestamp"))
+
+
+def compacted_events(events: List[Event], max_events: int) -> List[Event]:
+    """Keeps roughly the newest ``max_events`` events, starting on a user turn.
+
+    Cutting at a user message keeps tool calls and their responses together,
+    which the model requires.
+    """
+    if max_events <= 0:
+        return events
+    start = max(0, len(events) - max_events)
+    while start < len(events) and events[start].author != "user":
+        start += 1
+    return events[start:] if start < len(events) else events[-max_events:]
+
+
+class BoundedInMemorySessionService(InMemorySessionService):
+    """InMemorySessionService with TTL eviction and a per-session history cap."""
+
+    def __init__(self, ttl_seconds: float = SESSION_TTL_SECONDS, max_events: int = SESSION_MAX_EVENTS):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        session = await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+        if session and self.ttl_seconds and session.last_update_time < time.time() - self.ttl_seconds:
+            await self.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            return None
+        return session
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session, event)
+        if len(session.events) > self.max_events:
+            session.events[:] = compacted_events(session.events, self.max_events)
+            stored = self.sessions.get(session.app_name, {}).get(session.user_id, {}).get(session.id)
+            if stored is not None:
+                stored.events[:] = compacted_events(stored.events, self.max_events)
+        return event
+
+    async def evict_expired(self, app_name: str) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        evicted = 0
+        for sessions in self.sessions.get(app_name, {}).values():
+            for session_id in [sid for sid, s in sessions.items() if s.last_update_time < cutoff]:
+                sessions.pop(session_id, None)
+                evicted += 1
+        return evicted
+
+
+class BoundedDatabaseSessionService(DatabaseSessionService):
+    """DatabaseSessionService with TTL eviction, bounded history loads and compaction of old turns.
+
+    All workers share the same tables, so a ``session_id`` can be served by any
+    uvicorn worker. Only the newest ``max_events`` events are ever loaded, and
+    older ones are deleted once a session runs past that cap.
+    """
+
+    def __init__(self, db_url: str, ttl_seconds: float = SESSION_TTL_SECONDS, max_events: int = SESSION_MAX_EVENTS, **kwargs):
+        super().__init__(to_async_url(db_url), **kwargs)
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        config = config or GetSessionConfig()
+        if config.num_recent_events is None or config.num_recent_events > self.max_events:
+            config = GetSessionConfig(num_recent_events=self.max_events, after_timestamp=config.after_timestamp)
+        session = await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+        if session and self.ttl_seconds and session.last_update_time < time.time() - self.ttl_seconds:
+            await self.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            return None
+        if session:
+            # The capped load may start mid-turn; drop the partial turn
+            session.events[:] = compacted_events(session.events, self.max_events)
+        return session
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session, event)
+        # Compact at most once per turn (on the user message), and only for sessions
+        # long enough that the capped load in get_session may have left older rows behind
+        if event.author == "user" and len(session.events) >= self.max_events // 2:
+            session.events[:] = compacted_events(session.events, self.max_events)
+            if session.events:
+                await self._delete_events_before(session, session.events[0].id)
+        return event
+
+    async def _delete_events_before(self, session: Session, first_kept_id: str) -> None:
+        # Compared against the stored timestamp of the first kept event, so the
+        # column's storage format (naive local vs UTC, per ADK release) does not matter
+        match = (EVENTS.c.app_name == session.app_name, EVENTS.c.user_id == session.user_id, EVENTS.c.session_id == session.id)
+        first_kept = select(EVENTS.c.timestamp).where(*match, EVENTS.c.id == first_kept_id).scalar_subquery()
+        async with self.database_session_factory() as sql_session:
+            await sql_session.execute(delete(EVENTS).where(*match, EVENTS.c.timestamp < first_kept))
+            await sql_session.commit()
+
+    async def evict_expired(self, app_name: str) -> int:
+        """Deletes every session of ``app_name`` idle for longer than the TTL. Returns the number removed.
+
+        Events go with their session (ON DELETE CASCADE, which ADK also turns on for SQLite).
+        """
+        cutoff = time.time() - self.ttl_seconds
+        listed = await self.list_sessions(app_name=app_name)
+        expired = [s for s in listed.sessions if s.last_update_time < cutoff]
+        for session in expired:
+            await self.delete_session(app_name=app_name, user_id=session.user_id, session_id=session.id)
+        return len(expired)
+
+
+def build_session_service() -> BaseSessionService:
+    """Creates the session store selected by SESSION_BACKEND."""
+    if SESSION_BACKEND == "memory":
+        return BoundedInMemorySessionService()
+    if SESSION_BACKEND == "sqlite":
+        return BoundedDatabaseSessionService(f"sqlite:///{SESSION_SQLITE_PATH}")
+    if SESSION_BACKEND == "postgres":
+        return BoundedDatabaseSessionService(
+            DATABASE_URL,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    raise ValueError(f"Unknown SESSION_BACKEND '{SESSION_BACKEND}' (expected memory, postgres or sqlite).")
+
+
+async def evict_expired_sessions_forever(session_service: BaseSessionService, app_name: str, interval: float = SESSION_EVICT_INTERVAL_SECONDS) -> None:
+    """Background task that periodically drops idle sessions of ``app_name``."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            evicted = await session_service.evict_expired(app_name)
+            if evicted:
+                print(f"Evicted {evicted} expired chat sessions.")
+        except Exception as e:
+            print(f"Session eviction failed: {e}")
@@ -0,0 +1,180 @@
+# app/static_assets.py
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+# Optional: `pip install brotli` adds a br variant next to gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "frontend")
+# Bodies smaller than this are sent as-is; compression would not pay for the extra headers
+STATIC_MIN_COMPRESS_BYTES = int(os.getenv("STATIC_MIN_COMPRESS_BYTES", "512"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Pages and unhashed asset URLs are revalidated every time (a cheap 304 while unchanged)
+REVALIDATE = "no-cache"
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# href="static/css/style.css" / src="/static/js/main.js" in the pages
+ASSET_REFERENCE = re.compile(r'(href|src)="/?static/([^"?#]+)"')
+PRELOAD_AS = {".css": "style", ".js": "script"}
+
+
+@dataclass
+class StaticAsset:
+    """One file held in memory: identity bytes plus whichever compressed variants are smaller."""
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    variants: Dict[str, bytes] = field(default_factory=dict)  # content-coding -> body
+    link: Optional[str] = None  # preload header for pages
+
+    @classmethod
+    def build(cls, body: bytes, media_type: str, cache_control: str, link: Optional[str] = None) -> "StaticAsset":
+        asset = cls(body, media_type, f'"{hashlib.sha256(body).hexdigest()[:20]}"', cache_control, link=link)
+        if len(body) >= STATIC_MIN_COMPRESS_BYTES and media_type.startswith(COMPRESSIBLE):
+            candidates = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                candidates["br"] = brotli.compress(body, quality=11)
+            asset.variants = {coding: data for coding, data in candidates.items() if len(data) < len(body)}
+        return asset
+
+    def response(self, request_headers: Headers, head: bool = False) -> Response:
+        coding = negotiate(request_headers.get("accept-encoding", ""), self.variants)
+        # Each representation gets its own strong validator
+        etag = self.etag if coding is None else f'{self.etag[:-1]}-{coding}"'
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if self.link:
+            headers["Link"] = self.link
+        if _not_modified(request_headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        body = self.body if coding is None else self.variants[coding]
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+        response = Response(b"" if head else body, media_type=self.media_type, headers=headers)
+        response.headers["Content-Length"] = str(len(body))
+        return response
+
+
+def negotiate(accept_encoding: str, variants: Dict[str, bytes]) -> Optional[str]:
+    """Smallest acceptable variant for an Accept-Encoding header, or None for identity."""
+    if not variants or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    usable = [c for c in variants if accepted.get(c, accepted.get("*", 0.0)) > 0]
+    return min(usable, key=lambda c: len(variants[c])) if usable else None
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Any of the asset's representations validates: "abc", "abc-gzip" and "abc-br" share content
+    base = etag[1:-1]
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag == base or tag.startswith(base + "-"):
+            return True
+    return False
+
+
+def fingerprinted(path: str, body: bytes) -> str:
+    """css/style.css -> css/style.3f2a9c1d0b.css"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:10]}{ext}"
+
+
+class StaticSite:
+    """The frontend, read and compressed once at startup and served from memory.
+
+    Files under static/ are served at their hashed URL with an immutable cache
+    lifetime (and at their plain URL, revalidated); pages are rewritten to point
+    at the hashed URLs and preload them.
+    """
+
+    def __init__(self, root: str = FRONTEND_DIR):
+        self.root = root
+        self.assets: Dict[str, StaticAsset] = {}  # path below /static/ -> asset
+        self.pages: Dict[str, StaticAsset] = {}  # page name (no .html) -> asset
+        self.manifest: Dict[str, str] = {}  # plain path -> hashed path
+
+    def load(self) -> "StaticSite":
+        static_dir = os.path.join(self.root, "static")
+        for directory, _, files in os.walk(static_dir):
+            for name in files:
+                full = os.path.join(directory, name)
+                path = os.path.relpath(full, static_dir).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    body = f.read()
+                media_type = _media_type(name)
+                hashed = fingerprinted(path, body)
+                self.manifest[path] = hashed
+                self.assets[hashed] = StaticAsset.build(body, media_type, IMMUTABLE)
+                self.assets[path] = StaticAsset(self.assets[hashed].body, media_type, self.assets[hashed].etag, REVALIDATE, self.assets[hashed].variants)
+
+        for name in os.listdir(self.root):
+            if name.endswith(".html"):
+                with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                    html, preloads = self._rewrite(f.read())
+                link = ", ".join(f"</static/{p}>; rel=preload; as={PRELOAD_AS[os.path.splitext(p)[1]]}" for p in preloads) or None
+                self.pages[name[:-5]] = StaticAsset.build(html.encode("utf-8"), "text/html; charset=utf-8", REVALIDATE, link=link)
+        print(f"✅ Static assets: {len(self.pages)} pages, {len(self.manifest)} files (brotli {'on' if brotli else 'off'})")
+        return self
+
+    def _rewrite(self, html: str) -> Tuple[str, List[str]]:
+        preloads = []
+
+        def to_hashed(match: re.Match) -> str:
+            hashed = self.manifest.get(match.group(2))
+            if hashed is None:
+                return match.group(0)
+            if os.path.splitext(hashed)[1] in PRELOAD_AS and hashed not in preloads:
+                preloads.append(hashed)
+            return f'{match.group(1)}="/static/{hashed}"'
+
+        return ASSET_REFERENCE.sub(to_hashed, html), preloads
+
+    def page(self, name: str) -> Optional[StaticAsset]:
+        return self.pages.get(name)
+
+    async def __call__(self, scope, receive, send):
+        """ASGI app for the /static mount."""
+        # Below the mount point: Starlette keeps the full path and moves the prefix into root_path
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        asset = self.assets.get(path.lstrip("/"))
+        if scope["method"] not in ("GET", "HEAD"):
+            response = Response("Method Not Allowed", status_code=405, media_type="text/plain", headers={"Allow": "GET, HEAD"})
+        elif asset is None:
+            response = Response("Not Found", status_code=404, media_type="text/plain")
+        else:
+            response = asset.response(Headers(scope=scope), head=scope["method"] == "HEAD")
+        await response(scope, receive, send)
+
+
+def _media_type(name: str) -> str:
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return f"{media_type}; charset=utf-8" if media_type.startswith("text/") or media_type == "application/javascript" else media_type
@@ -0,0 +1,117 @@
+# app/streaming.py
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from fastapi import Request
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.genai import types as genai_types
+
+from .context_budget import TokenUsage
+from .telemetry import request_id_var, trace_agent_events
+
+# Ask the model for incremental text instead of one final message
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # stop nginx-style proxies from buffering the stream
+}
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encodes one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Returns once the client has gone away (the request body has already been read)."""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _pump(events: AsyncIterator, queue: asyncio.Queue) -> None:
+    # Runs the whole agent run in one task, so it can be cancelled as a unit
+    try:
+        async for event in events:
+            await queue.put(event)
+        await queue.put(None)
+    except Exception as e:
+        await queue.put(e)
+    finally:
+        await events.aclose()
+
+
+async def stream_agent_events(
+    runner: Runner,
+    request: Request,
+    user_id: str,
+    session_id: str,
+    new_message: genai_types.Content,
+    final_key: str = "response",
+    on_final: Optional[Callable[[str], Awaitable[None]]] = None,
+    usage: Optional[TokenUsage] = None,
+) -> AsyncIterator[str]:
+    """Forwards an agent run as SSE frames and stops the run when the client goes away.
+
+    Emits ``delta`` (partial text), ``tool_call`` / ``tool_result`` (tool progress),
+    then a single ``done`` frame carrying the full final text under ``final_key``
+    (and the turn's token usage when ``usage`` is given).
+
+    The run goes on in its own task while a second one watches for the client's
+    disconnect, so a client that leaves mid model call or tool call cancels the
+    run right away instead of after the next event.
+    """
+    events = trace_agent_events(
+        runner.run_async(user_id=user_id, session_id=session_id, new_message=new_message, run_config=STREAMING_RUN_CONFIG),
+        request.url.path,
+    )
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    run = asyncio.create_task(_pump(events, queue))
+    client_gone = asyncio.create_task(wait_for_disconnect(request))
+    final_response: Optional[str] = None
+    try:
+        while True:
+            next_event = asyncio.ensure_future(queue.get())
+            await asyncio.wait({next_event, client_gone}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_event.done():
+                next_event.cancel()
+                return
+            event = next_event.result()
+            if event is None:
+                final_response = "[Agent did not produce a final response]"
+                break
+            if isinstance(event, Exception):
+                raise event
+            if usage is not None:
+                usage.observe(event)
+            if not event.content or not event.content.parts:
+                continue
+            for part in event.content.parts:
+                if part.function_call:
+                    yield format_sse("tool_call", {"name": part.function_call.name, "args": part.function_call.args or {}})
+                elif part.function_response:
+                    yield format_sse("tool_result", {"name": part.function_response.name})
+                elif part.text and event.partial:
+                    yield format_sse("delta", {"text": part.text})
+            if event.is_final_response() and not event.partial:
+                final_response = "".join(p.text for p in event.content.parts if p.text)
+                break
+        if on_final is not None:
+            await on_final(final_response)
+        done = {final_key: final_response, "session_id": session_id}
+        if usage is not None:
+            done["usage"] = usage.to_dict()
+        yield format_sse("done", done)
+    except Exception as e:
+        logger.exception("[request %s] %s stream failed", request_id_var.get(), request.url.path)
+        yield format_sse("error", {"detail": str(e)})
+    finally:
+        # Cancelling the run task cancels any in-flight model or tool call of this run
+        run.cancel()
+        client_gone.cancel()
+        await asyncio.gather(run, client_gone, return_exceptions=True)
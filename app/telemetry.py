@@ -0,0 +1,271 @@
+# app/telemetry.py
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from opentelemetry import baggage
+from opentelemetry import context as otel_context
+from opentelemetry.baggage.propagation import W3CBaggagePropagator
+from sqlalchemy import event
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Baggage entry that carries the request ID to the tool server: ADK injects the
+# OpenTelemetry context (W3C baggage included) into every tools/call's _meta
+REQUEST_ID_BAGGAGE = "fitforge.request_id"
+# Log a span breakdown for agent runs / tool calls slower than this (0 = never)
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "0"))
+
+# stderr: under the stdio transport the tool server's stdout is the MCP channel
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+# (span, name, seconds) collected for the current request
+_spans_var: ContextVar[Optional[List[Tuple[str, str, float]]]] = ContextVar("spans", default=None)
+_query_count_var: ContextVar[Optional[List[int]]] = ContextVar("query_count", default=None)
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Keeps a caller-supplied request ID (trimmed), otherwise makes a new one."""
+    return incoming.strip()[:64] if incoming and incoming.strip() else uuid.uuid4().hex
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = ['%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Minimal Prometheus histogram (cumulative buckets, _sum and _count per label set)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, List[float]] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count:g}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {values[-1]:g}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {values[-1]:g}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.callback())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", f"{self.name} {value:g}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._metrics[name]
+
+    def callback(self, name: str, documentation: str, callback: Callable[[], float], kind: str = "gauge") -> CallbackMetric:
+        """Registers a value owned elsewhere (e.g. cache counters), read on every scrape."""
+        self._metrics[name] = CallbackMetric(name, documentation, callback, kind)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+metrics = MetricsRegistry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+http_request_duration = metrics.histogram("fitforge_http_request_duration_seconds", "Time until response headers, per route.", ("method", "route", "status"))
+agent_span_duration = metrics.histogram("fitforge_agent_span_duration_seconds", "Time between agent events: model turns and tool executions.", ("endpoint", "span"))
+agent_run_duration = metrics.histogram("fitforge_agent_run_duration_seconds", "Whole agent run, first event to last.", ("endpoint",))
+tool_duration = metrics.histogram("fitforge_tool_duration_seconds", "MCP tool execution time inside the tool server.", ("tool", "status"))
+tool_db_queries = metrics.histogram("fitforge_tool_db_queries", "SQL statements executed per tool call.", ("tool",), QUERY_COUNT_BUCKETS)
+
+
+# == Request-scoped spans ==
+
+def start_request_trace(request_id: str) -> tuple:
+    """Binds a request ID and an empty span list to the current context; returns reset tokens.
+
+    The request ID also goes into the OpenTelemetry baggage, which ADK forwards
+    to the tool server with each tool call.
+    """
+    return request_id_var.set(request_id), _spans_var.set([]), otel_context.attach(baggage.set_baggage(REQUEST_ID_BAGGAGE, request_id))
+
+
+def end_request_trace(tokens: tuple) -> None:
+    otel_context.detach(tokens[2])
+    request_id_var.reset(tokens[0])
+    _spans_var.reset(tokens[1])
+
+
+def record_span(span: str, name: str, seconds: float) -> None:
+    spans = _spans_var.get()
+    if spans is not None:
+        spans.append((span, name, seconds))
+
+
+def server_timing() -> str:
+    """Server-Timing header value summing the spans recorded so far (model, tool)."""
+    totals: Dict[str, float] = {}
+    for span, _, seconds in _spans_var.get() or []:
+        totals[span] = totals.get(span, 0.0) + seconds
+    return ", ".join(f"{span};dur={seconds * 1000:.1f}" for span, seconds in totals.items())
+
+
+def _event_span(agent_event) -> Tuple[str, str]:
+    """Names the work that produced an agent event: a tool execution or a model turn."""
+    for part in (agent_event.content.parts if agent_event.content and agent_event.content.parts else []):
+        if part.function_response:
+            return "tool", part.function_response.name
+        if part.function_call:
+            return "model", f"call {part.function_call.name}"
+    return "model", "text"
+
+
+async def trace_agent_events(events: AsyncIterator, endpoint: str) -> AsyncIterator:
+    """Re-yields runner events, timing the gap before each one as a model or tool span.
+
+    Time spent by the consumer between events is excluded. Closing this generator
+    closes ``events`` too, so cancelling a run still works.
+    """
+    run_start = last = time.perf_counter()
+    spans: List[Tuple[str, str, float]] = []
+    try:
+        async for agent_event in events:
+            span, name = _event_span(agent_event)
+            elapsed = time.perf_counter() - last
+            agent_span_duration.observe(elapsed, endpoint=endpoint, span=span)
+            record_span(span, name, elapsed)
+            spans.append((span, name, elapsed))
+            yield agent_event
+            last = time.perf_counter()
+    finally:
+        await events.aclose()
+        total = time.perf_counter() - run_start
+        agent_run_duration.observe(total, endpoint=endpoint)
+        if TRACE_SLOW_MS and total * 1000 >= TRACE_SLOW_MS:
+            breakdown = ", ".join(f"{span}[{name}] {seconds * 1000:.0f}ms" for span, name, seconds in spans)
+            logger.warning("[trace %s] %s agent run %.0fms: %s", request_id_var.get(), endpoint, total * 1000, breakdown)
+
+
+# == Tool server instrumentation ==
+
+def install_query_counter(engine) -> None:
+    """Counts SQL statements per tool call (the async engine's events fire on its sync engine)."""
+    @event.listens_for(getattr(engine, "sync_engine", engine), "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = _query_count_var.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+def _meta_request_id() -> Optional[str]:
+    try:
+        from fastmcp.server.dependencies import get_context
+        carrier = {"baggage": str(get_context().request_context.meta["baggage"])}
+    except Exception:
+        return None
+    request_id = baggage.get_baggage(REQUEST_ID_BAGGAGE, W3CBaggagePropagator().extract(carrier, context=otel_context.Context()))
+    return str(request_id) if request_id else None
+
+
+def _incoming_request_id() -> Optional[str]:
+    """The caller's request ID: baggage in the call's _meta (any transport), else the X-Request-ID header."""
+    request_id = _meta_request_id()
+    if request_id:
+        return request_id
+    try:
+        from fastmcp.server.dependencies import get_http_headers
+        return get_http_headers().get(REQUEST_ID_HEADER.lower())
+    except Exception:
+        return None
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """Wraps a tool with duration and DB query count metrics, keeping its signature for MCP."""
+    name = fn.__name__
+
+    def _finish(start: float, counter: List[int], status: str) -> None:
+        elapsed = time.perf_counter() - start
+        tool_duration.observe(elapsed, tool=name, status=status)
+        tool_db_queries.observe(counter[0], tool=name)
+        if TRACE_SLOW_MS and elapsed * 1000 >= TRACE_SLOW_MS:
+            logger.warning("[trace %s] tool %s %.0fms, %d queries (%s)", request_id_var.get(), name, elapsed * 1000, counter[0], status)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            counter, start, status = [0], time.perf_counter(), "ok"
+            tokens = request_id_var.set(new_request_id(_incoming_request_id())), _query_count_var.set(counter)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                _finish(start, counter, status)
+                request_id_var.reset(tokens[0])
+                _query_count_var.reset(tokens[1])
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            counter, start, status = [0], time.perf_counter(), "ok"
+            tokens = request_id_var.set(new_request_id(_incoming_request_id())), _query_count_var.set(counter)
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                _finish(start, counter, status)
+                request_id_var.reset(tokens[0])
+                _query_count_var.reset(tokens[1])
+    return wrapper
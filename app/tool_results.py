@@ -0,0 +1,317 @@
+# app/tool_results.py
+import functools
+import inspect
+import os
+from typing import Callable, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, model_serializer
+
+from .name_resolver import Resolution
+
+# "json" returns the typed results below (structured content with an output schema);
+# "prose" turns each one back into the English sentence the tools used to return
+TOOL_OUTPUT_FORMAT = os.getenv("TOOL_OUTPUT_FORMAT", "json").lower()
+
+
+class ToolResult(BaseModel):
+    """Base for tool results: compact fields for the model, ``to_prose()`` for the prose mode.
+
+    Tools that always returned structured data keep the default ``to_prose()`` (compact JSON).
+    """
+
+    @model_serializer(mode="wrap")
+    def _drop_none(self, handler):
+        # Unset optional fields cost tokens on every call without telling the model anything
+        return {key: value for key, value in handler(self).items() if value is not None}
+
+    def to_prose(self) -> str:
+        return self.model_dump_json()
+
+
+def _items(names: List[str]) -> str:
+    return ", ".join(names)
+
+
+# == Errors ==
+
+class NameScore(BaseModel):
+    name: str
+    score: float
+
+
+def closest_names(resolution: Resolution) -> List[NameScore]:
+    return [NameScore(name=m.record.name, score=round(m.score, 2)) for m in resolution.matches]
+
+
+def _scored(matches: List[NameScore]) -> str:
+    return _items([f"{m.name} ({m.score:.2f})" for m in matches])
+
+
+class NotFound(ToolResult):
+    """Returned instead of guessing when a name does not resolve confidently."""
+    error: Literal["not_found"] = "not_found"
+    kind: str
+    query: str
+    closest: List[NameScore] = []
+
+    @classmethod
+    def from_resolution(cls, kind: str, resolution: Resolution) -> "NotFound":
+        return cls(kind=kind, query=resolution.query, closest=closest_names(resolution))
+
+    def to_prose(self) -> str:
+        message = f"{self.kind.capitalize()} '{self.query}' not found."
+        if self.closest:
+            message += f" Closest matches: {_scored(self.closest)}."
+        return message
+
+
+class InvalidInput(ToolResult):
+    """Returned when an argument cannot be parsed, naming the format that was expected."""
+    error: Literal["invalid_input"] = "invalid_input"
+    field: str
+    value: str
+    expected: str
+
+    def to_prose(self) -> str:
+        return f"Invalid {self.field} '{self.value}': expected {self.expected}."
+
+
+# == Health Calculations ==
+
+class MacroTargets(ToolResult):
+    calories: int
+    protein_g: int
+    carbs_g: int
+    fat_g: int
+
+
+class BMIResult(ToolResult):
+    bmi: float
+    category: str
+
+    def to_prose(self) -> str:
+        return f"A BMI of {self.bmi} is in the '{self.category}' category."
+
+
+class OneRepMax(ToolResult):
+    one_rep_max_kg: Optional[float] = None
+    note: Optional[str] = None
+
+    def to_prose(self) -> str:
+        if self.one_rep_max_kg is None:
+            return self.note or "No one-rep max estimate available."
+        return f"The estimated one-rep max is {self.one_rep_max_kg}kg."
+
+
+# == Knowledge Base Lookups ==
+
+class ExerciseList(ToolResult):
+    exercises: List[str]
+
+    def to_prose(self) -> str:
+        if not self.exercises:
+            return "No exercises found for that muscle and equipment."
+        return f"Here are some suitable exercises: {_items(self.exercises)}."
+
+
+class FoodMacros(ToolResult):
+    food: str
+    grams: float
+    calories: int
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    match_score: float
+    # Only set when the match is a guess, so the model can ask or retry
+    closest: Optional[List[NameScore]] = None
+
+    def to_prose(self) -> str:
+        answer = f"{self.grams}g of {self.food} has approximately: {self.calories} calories, {self.protein_g}g protein, {self.carbs_g}g carbs, and {self.fat_g}g fat."
+        if self.closest:
+            answer += f" (Closest matches: {_scored(self.closest)}.)"
+        return answer
+
+
+class MacroTotals(BaseModel):
+    calories: int
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+
+
+class MealItemMacros(MacroTotals):
+    food_name: str
+    matched_food: str
+    match_score: float
+    grams: float
+
+
+class MealMacros(ToolResult):
+    items: List[MealItemMacros]
+    unmatched: List[str]
+    totals: MacroTotals
+
+
+class PlannedFood(MacroTotals):
+    food: str
+    grams: float
+
+
+class PlannedMeal(BaseModel):
+    meal: int
+    items: List[PlannedFood]
+    totals: MacroTotals
+
+
+class MealPlan(ToolResult):
+    meals: List[PlannedMeal]
+    totals: MacroTotals
+    # Signed miss per daily target, in percent
+    deviation_pct: Dict[str, float]
+    within_tolerance: bool
+
+    def to_prose(self) -> str:
+        lines = [f"Meal {m.meal}: " + _items([f"{i.grams:g}g {i.food}" for i in m.items]) + "." for m in self.meals]
+        t = self.totals
+        lines.append(f"Daily total: {t.calories} calories, {t.protein_g}g protein, {t.carbs_g}g carbs, {t.fat_g}g fat.")
+        return " ".join(lines)
+
+
+# == Data Logging ==
+
+class WorkoutLogged(ToolResult):
+    exercise: str
+    sets: int
+    reps: int
+    weight_kg: float
+
+    def to_prose(self) -> str:
+        return f"Successfully logged workout: {self.sets} sets of {self.reps} reps of {self.exercise} at {self.weight_kg}kg."
+
+
+class WeightLogged(ToolResult):
+    weight_kg: float
+
+    def to_prose(self) -> str:
+        return f"Successfully logged today's weight as {self.weight_kg}kg."
+
+
+class RejectedRow(BaseModel):
+    row: int
+    error: str
+
+
+class IngestResult(ToolResult):
+    accepted: int
+    workouts: int
+    weights: int
+    rejected_count: int
+    rejected: List[RejectedRow]
+
+
+# == Progress Monitoring ==
+
+class LoggedSet(BaseModel):
+    date: str
+    sets: int
+    reps: int
+    weight_kg: float
+
+
+class StrengthProgress(ToolResult):
+    exercise: str
+    # Both None until there are at least two logged sessions
+    first: Optional[LoggedSet] = None
+    latest: Optional[LoggedSet] = None
+
+    def to_prose(self) -> str:
+        if self.first is None or self.latest is None:
+            return f"Not enough data to show progress for {self.exercise}. Keep logging your workouts!"
+        return (f"Strength progress for {self.exercise}: You started at {self.first.weight_kg}kg for {self.first.reps} reps on {self.first.date}. "
+                f"Your latest lift was {self.latest.weight_kg}kg for {self.latest.reps} reps on {self.latest.date}.")
+
+
+class WeeklyVolume(BaseModel):
+    week_start: str
+    sets: int
+    volume_kg: float
+
+
+class StrengthAnalytics(ToolResult):
+    exercise: str
+    sessions: int
+    first: Optional[LoggedSet] = None
+    latest: Optional[LoggedSet] = None
+    best_e1rm_kg: Optional[float] = None
+    e1rm_trend_kg_per_week: Optional[float] = None
+    weekly_volume: List[WeeklyVolume] = []
+
+
+class WeightTrend(ToolResult):
+    days: int
+    days_logged: int
+    # All None until the user has logged a weight in the window
+    latest_date: Optional[str] = None
+    trend_kg: Optional[float] = None
+    change_kg: Optional[float] = None
+    rate_kg_per_week: Optional[float] = None
+    min_kg: Optional[float] = None
+    max_kg: Optional[float] = None
+
+    def to_prose(self) -> str:
+        if self.trend_kg is None:
+            return f"No weight logged in the last {self.days} days. Keep logging your weight!"
+        message = f"Your trend weight is {self.trend_kg}kg as of {self.latest_date} ({self.days_logged} days logged in the last {self.days}, range {self.min_kg}-{self.max_kg}kg)."
+        if self.change_kg is not None:
+            message += f" That is {self.change_kg:+}kg over the period, about {self.rate_kg_per_week:+}kg per week."
+        return message
+
+
+class VolumePeriod(BaseModel):
+    start: str
+    sets: int
+    reps: int
+    tonnage_kg: float
+    best_e1rm_kg: Optional[float] = None
+
+
+class TrainingVolume(ToolResult):
+    muscle: Optional[str] = None  # None = every muscle group
+    period: str
+    periods: List[VolumePeriod] = []
+
+
+class Substitutions(ToolResult):
+    exercise: str
+    target_muscle: str
+    substitutes: List[str]
+
+    def to_prose(self) -> str:
+        if not self.substitutes:
+            return f"No substitutes found for {self.target_muscle} with your equipment."
+        return f"Here are some suitable substitutes for {self.exercise} using your equipment: {_items(self.substitutes)}. The user should choose one."
+
+
+# == Output Format ==
+
+def as_prose(fn: Callable) -> Callable:
+    """Wraps a tool so it returns ``result.to_prose()`` and declares a plain string output."""
+    signature = inspect.signature(fn).replace(return_annotation=str)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return (await fn(*args, **kwargs)).to_prose()
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return fn(*args, **kwargs).to_prose()
+    # A fresh dict: functools.wraps shares the original's __annotations__
+    wrapper.__annotations__ = {**fn.__annotations__, "return": str}
+    wrapper.__signature__ = signature
+    return wrapper
+
+
+def output_format(fn: Callable) -> Callable:
+    """Applies TOOL_OUTPUT_FORMAT to a tool before it is registered with the MCP server."""
+    return as_prose(fn) if TOOL_OUTPUT_FORMAT == "prose" else fn
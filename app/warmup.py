@@ -0,0 +1,81 @@
+# app/warmup.py
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Requests that need the agent and arrive before the warmup finished wait this long, then get a 503
+WARMUP_WAIT_SECONDS = float(os.getenv("WARMUP_WAIT_SECONDS", "30"))
+# Seconds a client is told to wait when the warmup is still running (or failed)
+WARMUP_RETRY_AFTER_SECONDS = 5
+# A failed stage is retried after 1, 2, 4, ... seconds, at most this long apart
+MAX_STAGE_BACKOFF_SECONDS = 30
+
+
+class Warmup:
+    """Runs named startup stages once, in order, in the background.
+
+    The server answers liveness checks while the stages run; ``ready`` is set
+    only when every stage has finished. A failed stage (say, a tool server that
+    is not up yet) is reported by ``snapshot()`` and retried with backoff
+    instead of crashing the process.
+    """
+
+    def __init__(self, stages: List[Tuple[str, Callable[[], Awaitable[None]]]]):
+        self.stages = stages
+        self.ready = asyncio.Event()
+        self.stage: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        for name, stage in self.stages:
+            self.stage = name
+            start = time.perf_counter()
+            backoff = 1.0
+            while True:
+                try:
+                    await stage()
+                    break
+                except Exception as e:
+                    self.error = f"{name}: {e}"
+                    print(f"❌ Warmup stage '{name}' failed, retrying in {backoff:.0f}s: {e}")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, MAX_STAGE_BACKOFF_SECONDS)
+            self.error = None
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        self.stage = None
+        self.timings["total"] = round((time.perf_counter() - self._started) * 1000, 1)
+        self.ready.set()
+        print(f"✅ Warmup complete: {', '.join(f'{k} {v:.0f}ms' for k, v in self.timings.items())}")
+
+    async def wait(self, timeout: float = WARMUP_WAIT_SECONDS) -> bool:
+        """True once ready; False right away while a stage is failing, else after ``timeout`` seconds."""
+        if self.ready.is_set():
+            return True
+        if self.error or self._task is None:
+            return False
+        try:
+            await asyncio.wait_for(asyncio.shield(self.ready.wait()), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready.is_set(),
+            "stage": self.stage,
+            "timings_ms": dict(self.timings),
+            "error": self.error,
+        }
@@ -0,0 +1,280 @@
+# benchmarks/bench_api.py
+"""Offline load test of the FitForge API: scripted fake model, SQLite catalog, real MCP tool server.
+
+    python benchmarks/bench_api.py --endpoint both --requests 200 --concurrency 8
+
+Runs app.main:app in-process (through httpx's ASGI transport) with every pooled
+agent's Gemini model swapped for a deterministic script that calls real tools.
+The tool server is started as `python -m app.mcp_server --transport http`
+against a temporary SQLite database seeded with seed_db.py's catalog, so the
+API, the MCP transport and the tools are all measured; only the model is fake.
+No Gemini quota or Postgres is needed.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# (message, tool calls the scripted model makes before answering)
+CHAT_SCRIPT = [
+    ("How many calories are in 150g of chicken breast?", [("get_macronutrients_for_food", {"food_name": "chicken breast", "weight_grams": 150})]),
+    ("Log 3 sets of 5 bench press at 80kg for me.", [("log_workout", {"user_id": 1, "exercise_name": "bench press", "sets": 3, "reps": 5, "weight_kg": 80})]),
+    ("What is my BMI at 80kg and 180cm?", [("calculate_bmi", {"weight_kg": 80, "height_cm": 180})]),
+    ("What can I do instead of barbell bench press with only dumbbells?", [("suggest_exercise_substitutions", {"exercise_to_replace": "barbell bench press", "available_equipment": ["Dumbbells", "Bench"]})]),
+    ("How is my bench press progressing?", [("get_strength_analytics", {"user_id": 1, "exercise_name": "bench press"})]),
+    ("Oats with banana and almonds for breakfast, what are the macros?", [("calculate_meal_macros", {"items": [{"food_name": "oats", "grams": 80}, {"food_name": "banana", "grams": 120}, {"food_name": "almonds", "grams": 20}]})]),
+]
+PLAN_TOOLS = [
+    ("calculate_meal_macros", {"items": [{"food_name": "oats", "grams": 80}, {"food_name": "greek yogurt", "grams": 200}, {"food_name": "chicken breast", "grams": 200}, {"food_name": "brown rice", "grams": 250}, {"food_name": "salmon", "grams": 150}, {"food_name": "sweet potato", "grams": 200}]}),
+    ("find_exercises_by_muscle", {"target_muscle": "Legs", "equipment": "Barbell"}),
+]
+PLAN_REQUEST = {
+    "age": 30, "weight_kg": 80, "height_cm": 180, "gender": "male", "activity_level": "moderately_active",
+    "goal": "build_muscle", "available_equipment": ["Barbell", "Dumbbells", "Bench"], "days_per_week": 4,
+}
+PLAN_TEXT = "## Your FitForge Plan\n\n" + "\n".join(f"- Day {d}: 4 exercises, 3-4 sets of 8-12 reps, 60-90s rest." for d in range(1, 5)) * 8
+FOLLOW_UPS_PER_SESSION = 3
+
+_METRIC_LINE = re.compile(r'^(\w+)\{([^}]*)\} ([0-9.eE+-]+)$')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def configure_environment(args, workdir: str) -> dict:
+    """Everything app.main and the tool server read at import time; must run before importing them."""
+    mcp_port = free_port()
+    env = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SESSION_BACKEND": "memory",
+        "GOOGLE_API_KEY": "offline-benchmark",
+        "MCP_SERVER_URL": f"http://127.0.0.1:{mcp_port}/mcp",
+        "MCP_POOL_SIZE": str(args.pool_size),
+        "MCP_PORT": str(mcp_port),
+        "PLAN_CACHE_ENABLED": "true" if args.plan_cache else "false",
+        "PLAN_MAX_CONCURRENCY": str(args.concurrency),
+        "CHAT_MAX_CONCURRENCY": str(args.concurrency),
+        "CHAT_FAST_PATH_ENABLED": "false" if args.no_fast_path else "true",
+    }
+    os.environ.update(env)
+    return env
+
+
+def seed_catalog() -> None:
+    import seed_db
+    seed_db.DATABASE_URL = os.environ["DATABASE_URL"]
+    seed_db.seed_database()
+
+
+def start_tool_server(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.mcp_server", "--transport", "http", "--port", str(port)],
+        cwd=ROOT, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("The MCP tool server did not become healthy within 30s.")
+
+
+def scripted_llm(latency_ms: float):
+    """A BaseLlm that plays CHAT_SCRIPT / PLAN_TOOLS: one tool call per model turn, then a final answer."""
+    from google.adk.models.base_llm import BaseLlm
+    from google.adk.models.llm_response import LlmResponse
+    from google.genai import types
+
+    scripts = {message: calls for message, calls in CHAT_SCRIPT}
+
+    class ScriptedLlm(BaseLlm):
+        model: str = "scripted-benchmark-model"
+
+        async def generate_content_async(self, llm_request, stream: bool = False):
+            contents = llm_request.contents or []
+            turn_start = max((i for i, c in enumerate(contents) if c.role == "user" and any(p.text for p in c.parts or [])), default=0)
+            message = " ".join(p.text for p in contents[turn_start].parts or [] if p.text) if contents else ""
+            calls_done = sum(1 for c in contents[turn_start:] for p in c.parts or [] if p.function_response)
+            calls = PLAN_TOOLS if "Client Profile" in message else next((v for k, v in scripts.items() if k in message), [])
+            prompt_tokens = sum(len(p.text or "") for c in contents for p in c.parts or []) // 4
+            usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=prompt_tokens, candidates_token_count=40)
+            if latency_ms:
+                await asyncio.sleep(latency_ms / 1000)
+            if calls_done < len(calls):
+                name, args = calls[calls_done]
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))]), usage_metadata=usage)
+                return
+            text = PLAN_TEXT if "Client Profile" in message else "Here is what I found, based on the tool results above."
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), usage_metadata=usage, turn_complete=True)
+
+    return ScriptedLlm()
+
+
+async def drive(client: httpx.AsyncClient, endpoint: str, total: int, concurrency: int) -> dict:
+    """Sends ``total`` requests from ``concurrency`` workers; chat workers continue their sessions."""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    counter = iter(range(total))
+
+    async def worker(worker_id: int) -> None:
+        session_id: Optional[str] = None
+        turns = 0
+        for i in counter:
+            if endpoint == "/chat":
+                message = CHAT_SCRIPT[i % len(CHAT_SCRIPT)][0]
+                body = {"message": message, "session_id": session_id}
+            else:
+                # Distinct plan-cache buckets, so request coalescing does not hide agent runs
+                body = dict(PLAN_REQUEST, weight_kg=50 + (i % 60) * 2.5)
+            start = time.perf_counter()
+            response = await client.post(endpoint, json=body)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if endpoint == "/chat" and response.status_code == 200:
+                turns += 1
+                session_id = response.json()["session_id"] if turns % (FOLLOW_UPS_PER_SESSION + 1) else None
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {
+        "endpoint": endpoint,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "mean_ms": round(float(ms.mean()), 1),
+    }
+
+
+def parse_metrics(text: str) -> Dict[tuple, float]:
+    """{(metric name, (label pairs...)): value} for every labelled sample in Prometheus text."""
+    samples = {}
+    for line in text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            labels = tuple(sorted(re.findall(r'(\w+)="([^"]*)"', match.group(2))))
+            samples[(match.group(1), labels)] = float(match.group(3))
+    return samples
+
+
+def mean_by(samples: Dict[tuple, float], metric: str, label: str) -> Dict[str, dict]:
+    """Per-label count and mean (ms for durations) from a histogram's _sum and _count samples."""
+    totals: Dict[str, List[float]] = {}
+    for (name, labels), value in samples.items():
+        if name in (f"{metric}_sum", f"{metric}_count"):
+            key = dict(labels).get(label, "")
+            totals.setdefault(key, [0.0, 0.0])[0 if name.endswith("_sum") else 1] += value
+    return {key: {"calls": int(count), "mean": total / count} for key, (total, count) in sorted(totals.items()) if count}
+
+
+def delta(after: Dict[tuple, float], before: Dict[tuple, float]) -> Dict[tuple, float]:
+    return {key: value - before.get(key, 0.0) for key, value in after.items()}
+
+
+def print_report(results: List[dict], tool_samples: Dict[tuple, float], api_samples: Dict[tuple, float]) -> None:
+    print(f"\n{'endpoint':<16}{'reqs':>6}{'conc':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for r in results:
+        print(f"{r['endpoint']:<16}{r['requests']:>6}{r['concurrency']:>6}{r['throughput_rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}  {r['statuses']}")
+
+    tools = mean_by(tool_samples, "fitforge_tool_duration_seconds", "tool")
+    queries = mean_by(tool_samples, "fitforge_tool_db_queries", "tool")
+    print(f"\n{'tool (server side)':<34}{'calls':>7}{'mean ms':>10}{'queries':>9}")
+    for tool, stats in tools.items():
+        print(f"{tool:<34}{stats['calls']:>7}{stats['mean'] * 1000:>10.2f}{queries.get(tool, {}).get('mean', 0):>9.1f}")
+
+    spans = mean_by(api_samples, "fitforge_agent_span_duration_seconds", "span")
+    print(f"\n{'agent span (API side)':<34}{'count':>7}{'mean ms':>10}")
+    for span, stats in spans.items():
+        print(f"{span:<34}{stats['calls']:>7}{stats['mean'] * 1000:>10.2f}")
+    if "tool" in spans and tools:
+        server_mean = sum(s["mean"] * s["calls"] for s in tools.values()) / sum(s["calls"] for s in tools.values())
+        print(f"MCP transport + ADK overhead per tool call: {(spans['tool']['mean'] - server_mean) * 1000:.2f} ms")
+
+
+async def run(args) -> List[dict]:
+    import app.main
+    from app.fast_path import fast_path_stats
+    from app.telemetry import metrics
+
+    app_ = app.main.app
+    tool_metrics_url = f"http://127.0.0.1:{os.environ['MCP_PORT']}/metrics"
+    endpoints = {"chat": ["/chat"], "plan": ["/generate-plan"], "both": ["/chat", "/generate-plan"]}[args.endpoint]
+    results = []
+    async with app_.router.lifespan_context(app_):
+        # The runner pool only exists once the warmup has built the agent stack
+        if not await app.main.warmup.wait(timeout=120):
+            raise RuntimeError(f"Warmup did not finish: {app.main.warmup.snapshot()}")
+        for runner in app.main.runner_pool.runners:
+            runner.agent.model = scripted_llm(args.model_latency_ms)
+        transport = httpx.ASGITransport(app=app_)
+        async with httpx.AsyncClient(transport=transport, base_url="http://fitforge.bench", timeout=120) as client:
+            for endpoint in endpoints:
+                await drive(client, endpoint, args.warmup, 1)
+            tools_before, api_before = parse_metrics(httpx.get(tool_metrics_url).text), parse_metrics(metrics.render())
+            for endpoint in endpoints:
+                results.append(await drive(client, endpoint, args.requests, args.concurrency))
+            tools_after, api_after = parse_metrics(httpx.get(tool_metrics_url).text), parse_metrics(metrics.render())
+    print_report(results, delta(tools_after, tools_before), delta(api_after, api_before))
+    if "/chat" in endpoints:
+        print(f"\nChat fast path (warmup included): {fast_path_stats.snapshot()}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", choices=["chat", "plan", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3, help="untimed requests per endpoint first")
+    parser.add_argument("--model-latency-ms", type=float, default=20.0, help="simulated time per model call")
+    parser.add_argument("--pool-size", type=int, default=4, help="MCP_POOL_SIZE (tool server connections)")
+    parser.add_argument("--plan-cache", action="store_true", help="leave the plan cache on (off by default, so every plan runs the agent)")
+    parser.add_argument("--no-fast-path", action="store_true", help="send every chat message through the agent (CHAT_FAST_PATH_ENABLED=false)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # ADK's OpenTelemetry spans log a harmless error whenever a run is closed early
+    logging.getLogger("opentelemetry.context").setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory(prefix="fitforge-bench-") as workdir:
+        configure_environment(args, workdir)
+        os.chdir(ROOT)
+        seed_catalog()
+        server = start_tool_server(int(os.environ["MCP_PORT"]))
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
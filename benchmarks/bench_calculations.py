@@ -0,0 +1,73 @@
+# benchmarks/bench_calculations.py
+"""Throughput of the batch TDEE/macro/BMI/1RM engine versus the per-row tools.
+
+    python benchmarks/bench_calculations.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app import calculations
+from app.tools import calculate_bmi, calculate_tdee_and_macros, estimate_one_rep_max
+
+ACTIVITY_LEVELS = list(calculations.ACTIVITY_MULTIPLIERS)
+GOALS = ["lose_fat", "build_muscle", "maintain"]
+
+
+def synthetic_population(rows: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "weight_kg": np.round(rng.uniform(45, 140, rows), 1),
+        "height_cm": np.round(rng.uniform(150, 205, rows), 1),
+        "age": rng.integers(16, 80, rows),
+        "gender": rng.choice(["male", "female"], rows),
+        "activity_level": rng.choice(ACTIVITY_LEVELS, rows),
+        "goal": rng.choice(GOALS, rows),
+        "reps": rng.integers(1, 13, rows),
+    }
+
+
+def timed(label: str, rows: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms  {rows / elapsed:14,.0f} rows/s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scalar-rows", type=int, default=20_000, help="rows pushed through the per-row tools for comparison")
+    args = parser.parse_args()
+
+    p = synthetic_population(args.rows)
+    print(f"Batch engine, {args.rows:,} rows")
+    targets, t_macros = timed("tdee_and_macros", args.rows, lambda: calculations.tdee_and_macros(p["weight_kg"], p["height_cm"], p["age"], p["gender"], p["activity_level"], p["goal"]))
+    bmis, t_bmi = timed("bmi", args.rows, lambda: calculations.bmi(p["weight_kg"], p["height_cm"]))
+    e1rms, t_e1rm = timed("one_rep_max", args.rows, lambda: calculations.one_rep_max(p["weight_kg"], p["reps"]))
+
+    n = min(args.scalar_rows, args.rows)
+    print(f"\nPer-row tools, {n:,} rows")
+    rows = [{k: v[i].item() for k, v in p.items()} for i in range(n)]
+    scalar_macros, s_macros = timed("calculate_tdee_and_macros", n, lambda: [calculate_tdee_and_macros(r["weight_kg"], r["height_cm"], r["age"], r["gender"], r["activity_level"], r["goal"]) for r in rows])
+    _, s_bmi = timed("calculate_bmi", n, lambda: [calculate_bmi(r["weight_kg"], r["height_cm"]) for r in rows])
+    _, s_e1rm = timed("estimate_one_rep_max", n, lambda: [estimate_one_rep_max(r["weight_kg"], r["reps"]) for r in rows])
+
+    print("\nSpeedup (rows/s batch vs per-row)")
+    for label, batch, scalar in (("tdee_and_macros", t_macros, s_macros), ("bmi", t_bmi, s_bmi), ("one_rep_max", t_e1rm, s_e1rm)):
+        print(f"{label:<28} {(args.rows / batch) / (n / scalar):10.0f}x")
+
+    # Both paths must agree exactly
+    for i, macros in enumerate(scalar_macros):
+        macros = macros.model_dump()
+        assert macros == {k: int(targets[k][i]) for k in macros}, (i, macros)
+    print(f"\nBatch and per-row macro results agree on all {n:,} compared rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_meal_planner.py
+"""Latency and accuracy of the meal plan solver across food catalog sizes.
+
+    python benchmarks/bench_meal_planner.py --sizes 23 1000 10000 100000 --plans 200
+
+Loads seed_db.py's foods from a temporary SQLite database, then grows the catalog
+to each size with perturbed copies of them (a 100k-food catalog is mostly near
+duplicates, which is the hard case for candidate ranking). Daily targets come from
+the TDEE/macro engine over a synthetic population.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+ACTIVITY_LEVELS = ["sedentary", "lightly_active", "moderately_active", "very_active"]
+GOALS = ["lose_fat", "build_muscle", "maintain"]
+
+
+def load_seed_foods(workdir: str) -> list:
+    """Seeds a throwaway SQLite database and reads the foods back through the catalog loader."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    import seed_db
+    seed_db.DATABASE_URL = os.environ["DATABASE_URL"]
+    seed_db.seed_database()
+    from app.catalog import CatalogCache
+    return asyncio.run(CatalogCache().load()).foods
+
+
+def grow_catalog(seed_foods: list, size: int, seed: int = 0) -> list:
+    from app.catalog import FoodRecord
+    rng = np.random.default_rng(seed)
+    foods = list(seed_foods[:size])
+    for i in range(len(foods), size):
+        base = seed_foods[i % len(seed_foods)]
+        p, c, f = (max(0.0, round(v * rng.uniform(0.7, 1.3), 1)) for v in (base.protein_g_per_100g, base.carbs_g_per_100g, base.fat_g_per_100g))
+        kcal = round((4 * p + 4 * c + 9 * f) * rng.uniform(0.95, 1.05))
+        foods.append(FoodRecord(100_000 + i, f"{base.name} #{i}", kcal, p, c, f))
+    return foods
+
+
+def daily_targets(plans: int, seed: int = 1) -> list:
+    from app import calculations
+    rng = np.random.default_rng(seed)
+    t = calculations.tdee_and_macros(
+        rng.uniform(50, 120, plans), rng.uniform(155, 200, plans), rng.integers(18, 70, plans),
+        rng.choice(["male", "female"], plans), rng.choice(ACTIVITY_LEVELS, plans), rng.choice(GOALS, plans),
+    )
+    return [tuple(int(t[k][i]) for k in ("calories", "protein_g", "carbs_g", "fat_g")) for i in range(plans)]
+
+
+def bench_size(foods: list, targets: list, meals: int, exclude: list) -> dict:
+    from app.catalog import CatalogSnapshot
+    from app.meal_planner import meal_index, solve_meal_plan
+    snapshot = CatalogSnapshot([], foods)
+    start = time.perf_counter()
+    meal_index(snapshot)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies, misses, within = [], [], 0
+    for calories, protein_g, carbs_g, fat_g in targets:
+        start = time.perf_counter()
+        plan = solve_meal_plan(snapshot, calories, protein_g, carbs_g, fat_g, meals=meals, exclude_foods=exclude)
+        latencies.append((time.perf_counter() - start) * 1000)
+        misses.append(max(abs(d) for d in plan.deviation_pct.values()))
+        within += plan.within_tolerance
+    lat = np.array(latencies)
+    return {
+        "foods": len(foods),
+        "index_build_ms": round(build_ms, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p95_ms": round(float(np.percentile(lat, 95)), 2),
+        "max_ms": round(float(lat.max()), 2),
+        "within_tolerance": round(within / len(targets), 3),
+        "p95_miss_pct": round(float(np.percentile(misses, 95)), 1),
+        "max_miss_pct": round(float(max(misses)), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[23, 1_000, 10_000, 100_000])
+    parser.add_argument("--plans", type=int, default=200, help="daily targets solved per catalog size")
+    parser.add_argument("--meals", type=int, default=3)
+    parser.add_argument("--exclude", nargs="*", default=[], help="name fragments to exclude, e.g. peanut tuna")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        seed_foods = load_seed_foods(workdir)
+    targets = daily_targets(args.plans)
+    print(f"{len(seed_foods)} seed foods, {args.plans} daily targets, {args.meals} meals per plan")
+    print(f"{'foods':>8} {'index ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'in tol':>7} {'p95 miss%':>10} {'max miss%':>10}")
+    results = []
+    for size in args.sizes:
+        r = bench_size(grow_catalog(seed_foods, size), targets, args.meals, args.exclude)
+        results.append(r)
+        print(f"{r['foods']:>8,} {r['index_build_ms']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['max_ms']:>8.2f} "
+              f"{r['within_tolerance']:>7.1%} {r['p95_miss_pct']:>10.1f} {r['max_miss_pct']:>10.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"plans": args.plans, "meals": args.meals, "exclude": args.exclude, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
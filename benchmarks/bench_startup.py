@@ -0,0 +1,129 @@
+# benchmarks/bench_startup.py
+"""Import time, time to live/ready and first-request latency of the FitForge API.
+
+    python benchmarks/bench_startup.py --imports 5 --starts 3
+
+Measures `import app.main` in fresh interpreters, then starts uvicorn against a
+temporary SQLite database seeded with seed_db.py's catalog (HTTP tool server as in
+bench_api.py, in-memory sessions, no Gemini calls) and polls /healthz and /readyz.
+Once ready, it times the first and following requests on /chat (a fast-path
+question, so no model is needed) and /meal-plan, and prints the warmup's stages.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from bench_api import free_port, start_tool_server
+
+CHAT_REQUEST = {"message": "What is my BMI at 80kg and 180cm?"}
+MEAL_PLAN_REQUEST = {"calories": 2400, "protein_g": 160, "carbs_g": 260, "fat_g": 80}
+POLL_SECONDS = 0.1
+
+
+def seed_catalog(workdir: str, mcp_port: int) -> None:
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SESSION_BACKEND": "memory",
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "offline-benchmark"),
+        "MCP_SERVER_URL": f"http://127.0.0.1:{mcp_port}/mcp",
+    })
+    import seed_db
+    seed_db.DATABASE_URL = os.environ["DATABASE_URL"]
+    seed_db.seed_database()
+
+
+def time_import() -> float:
+    code = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=os.environ.copy(), capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1]) * 1000
+
+
+def wait_for(url: str, start: float, deadline: float) -> float:
+    """Milliseconds from ``start`` until ``url`` answers 200."""
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return (time.perf_counter() - start) * 1000
+        except httpx.HTTPError:
+            pass
+        time.sleep(POLL_SECONDS)
+    raise RuntimeError(f"{url} did not answer 200 in time.")
+
+
+def timed_post(client: httpx.Client, path: str, body: dict) -> float:
+    start = time.perf_counter()
+    client.post(path, json=body).raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def start_once(requests: int, timeout: float) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    result = {}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = start + timeout
+        result["live_ms"] = round(wait_for(f"{base}/healthz", start, deadline), 1)
+        result["ready_ms"] = round(wait_for(f"{base}/readyz", start, deadline), 1)
+        with httpx.Client(base_url=base, timeout=60) as client:
+            result["warmup_ms"] = client.get("/readyz").json()["timings_ms"]
+            for name, path, body in (("chat", "/chat", CHAT_REQUEST), ("meal_plan", "/meal-plan", MEAL_PLAN_REQUEST)):
+                latencies = [timed_post(client, path, body) for _ in range(requests + 1)]
+                result[f"{name}_first_ms"] = round(latencies[0], 2)
+                result[f"{name}_median_ms"] = round(statistics.median(latencies[1:]), 2)
+    finally:
+        stop = time.perf_counter()
+        server.terminate()
+        server.wait(timeout=30)
+        result["shutdown_ms"] = round((time.perf_counter() - stop) * 1000, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--imports", type=int, default=5, help="fresh interpreters timing `import app.main`")
+    parser.add_argument("--starts", type=int, default=3, help="server starts")
+    parser.add_argument("--requests", type=int, default=20, help="requests timed after the first one, per endpoint")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds a start may take to become ready")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="fitforge-bench-") as workdir:
+        mcp_port = free_port()
+        seed_catalog(workdir, mcp_port)
+        tool_server = start_tool_server(mcp_port)
+        try:
+            imports = [time_import() for _ in range(args.imports)]
+            print(f"import app.main: median {statistics.median(imports):.0f} ms (min {min(imports):.0f}, max {max(imports):.0f}, {len(imports)} runs)")
+            starts = []
+            for i in range(args.starts):
+                r = start_once(args.requests, args.timeout)
+                starts.append(r)
+                stages = ", ".join(f"{k} {v:.0f}" for k, v in r["warmup_ms"].items())
+                print(f"start {i + 1}: live {r['live_ms']:.0f} ms, ready {r['ready_ms']:.0f} ms (warmup ms: {stages}); "
+                      f"/chat first {r['chat_first_ms']:.1f} / median {r['chat_median_ms']:.1f} ms; "
+                      f"/meal-plan first {r['meal_plan_first_ms']:.1f} / median {r['meal_plan_median_ms']:.1f} ms; shutdown {r['shutdown_ms']:.0f} ms")
+        finally:
+            tool_server.terminate()
+            tool_server.wait(timeout=10)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "import_ms": imports, "starts": starts}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
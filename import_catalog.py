@@ -0,0 +1,52 @@
+# import_catalog.py
+import argparse
+import sys
+import os
+import urllib.request
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app.models import Base
+from app.catalog_import import CATALOG_TABLES, IMPORT_BATCH_SIZE, import_catalog_file
+from app.equipment import link_exercise_equipment
+from seed_db import DATABASE_URL
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import exercises or foods from CSV / JSON / NDJSON files. Resumable and safe to re-run.")
+    parser.add_argument("kind", choices=sorted(CATALOG_TABLES))
+    parser.add_argument("paths", nargs="+", help="CSV (header row), .json array or .jsonl/.ndjson files")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--force", action="store_true", help="re-import files that were already fully imported")
+    parser.add_argument("--refresh-url", default=os.getenv("CATALOG_REFRESH_URL"), help="tool server /catalog/refresh endpoint to call afterwards")
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(engine)  # only creates missing tables
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        for path in args.paths:
+            print(f"Importing {args.kind} from {path}...")
+            result = import_catalog_file(session, args.kind, path, batch_size=args.batch_size, force=args.force)
+            if not result.get("skipped"):
+                rejected = f", {result['rejected']:,} rows rejected" if result["rejected"] else ""
+                print(f"✅ {result['imported']:,} rows upserted in {result['seconds']}s ({result['rows_per_second']:,} rows/s){rejected}.")
+        if args.kind == "exercises":
+            # Re-imported exercises may list different equipment: their links are replaced
+            print(f"Updated {link_exercise_equipment(session)} exercise/equipment links.")
+    if args.refresh_url:
+        refresh_catalog(args.refresh_url)
+
+
+def refresh_catalog(url: str):
+    """Asks a running tool server to reload its catalog; otherwise it picks the rows up within CATALOG_TTL_SECONDS."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method="POST"), timeout=30) as response:
+            print(f"Tool server catalog reloaded: {response.read().decode()}")
+    except OSError as e:
+        print(f"⚠️ Could not reload the tool server catalog ({e}); it reloads within CATALOG_TTL_SECONDS.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# migrate_db.py
+import argparse
+from datetime import datetime
+import sys
+import os
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app.models import Base, ImportCheckpoint
+from app.equipment import link_exercise_equipment
+from app.name_resolver import create_trigram_indexes
+from app.rollups import rebuild_rollups
+from seed_db import DATABASE_URL
+
+# Indexes added after the first release; create_all() does not add them to existing tables
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_exercises_target_muscle ON exercises (target_muscle)",
+    "CREATE INDEX IF NOT EXISTS ix_workout_logs_user_exercise_date ON workout_logs (user_id, exercise_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_weight_logs_user_date ON weight_logs (user_id, date)",
+]
+
+# Recorded once the rollups have been backfilled; the tables alone say nothing, since
+# the logging tools start filling them as soon as the tool server creates them
+ROLLUP_BACKFILL = "migration:rollup_backfill"
+
+
+def migrate_database(rebuild: bool = False):
+    """Brings an existing database up to the current schema.
+
+    Safe to run repeatedly and on a live database: only missing tables, indexes
+    and links are created, user data is never touched. The weight/training rollups
+    are backfilled from the logs once (or again with ``rebuild``).
+    """
+    engine = create_engine(DATABASE_URL)
+
+    print("Creating missing tables...")
+    Base.metadata.create_all(engine)
+
+    print("Creating missing indexes...")
+    with engine.begin() as connection:
+        for statement in INDEXES:
+            connection.execute(text(statement))
+        # Postgres only: pg_trgm GIN indexes for fuzzy food/exercise names
+        create_trigram_indexes(connection)
+
+    print("Linking exercises to normalized equipment...")
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        created = link_exercise_equipment(session)
+
+        backfilled = session.get(ImportCheckpoint, ROLLUP_BACKFILL)
+        if rebuild or backfilled is None or backfilled.completed is None:
+            print("Rebuilding weight and training rollups from the logs...")
+            weights, workouts = rebuild_rollups(session)
+            session.merge(ImportCheckpoint(source=ROLLUP_BACKFILL, completed=datetime.utcnow(), updated_at=datetime.utcnow()))
+            session.commit()
+            print(f"   {weights} weight and {workouts} workout logs rolled up.")
+    print(f"✅ Database migration complete ({created} equipment links added or removed).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bring an existing FitForge database up to the current schema.")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="recompute the weight/training rollups from the raw logs")
+    migrate_database(parser.parse_args().rebuild_rollups)